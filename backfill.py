@@ -0,0 +1,163 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+import scraper
+from crawl_journal import load_journal, DONE
+from data_treatment import merge_data, clean_merged_df
+
+backfill_dir = Path('data') / 'backfill'
+manifest_path = backfill_dir / 'manifest.json'
+
+# The awards pages are only valid once they hold an award voting table, the first being the ROY of 1953.
+# The MVP was first awarded in 1956
+first_award_season = 1953
+
+# Data directories of each kind of page. Each shard is parsed into 'processed/shards/{shard}' of every
+# directory, and the shards are then combined into the usual processed csv files
+data_dirs = [scraper.mvp_save_dir, scraper.pstats_save_dir, scraper.team_record_save_dir, scraper.advanced_stats_dir]
+
+
+def decade_shards(start: int, end: int):
+    """
+    Splits a range of seasons into per-decade shards, e.g. 1956-2023 into 1956-1959, 1960-1969, ..., 2020-2023
+
+    Args:
+        start: first season, identified by the year the season ends
+        end: last season, included
+    Returns:
+        shards: list of (first season, last season) tuples
+    """
+    shards = []
+    shard_start = start
+    while shard_start <= end:
+        shard_end = min(shard_start - shard_start % 10 + 9, end)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end + 1
+    return shards
+
+def shard_name(shard: tuple):
+    return f'{shard[0]}_{shard[1]}'
+
+def shard_seasons(shard: tuple):
+    return list(range(shard[0], shard[1] + 1))
+
+def load_manifest():
+    """
+    Loads the backfill manifest, which records the shards that were already downloaded and parsed
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest: dict):
+    if not os.path.exists(backfill_dir):
+        os.makedirs(backfill_dir)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def download_shard(shard: tuple):
+    """
+    Downloads every page of the seasons of a shard. Pages already downloaded are skipped (see crawl_journal.py)
+
+    Returns:
+        downloaded: whether every page of the shard is recorded as done in the crawl journal
+    """
+    seasons = shard_seasons(shard)
+    scraper.download_mvp_votings(seasons)
+    scraper.download_player_stats(seasons)
+    scraper.download_team_records(seasons)
+    scraper.download_advanced_stats(seasons)
+
+    journal = load_journal()
+    return all(journal.get(f'{endpoint}/{year}', {}).get('status') == DONE
+               for endpoint in ['awards', 'per_game', 'standings', 'advanced']
+               for year in seasons)
+
+def parse_shard(shard: tuple):
+    """
+    Parses the downloaded pages of the seasons of a shard into its own processed csv files
+
+    Returns:
+        shard: the parsed shard
+    """
+    seasons = shard_seasons(shard)
+    scraper.parse_award_votings(seasons, scraper.mvp_save_dir / 'processed' / 'shards' / shard_name(shard))
+    scraper.parse_player_stats(seasons, scraper.pstats_save_dir / 'processed' / 'shards' / shard_name(shard))
+    scraper.parse_team_records(seasons, scraper.team_record_save_dir / 'processed' / 'shards' / shard_name(shard))
+    scraper.parse_advanced_stats(seasons, scraper.advanced_stats_dir / 'processed' / 'shards' / shard_name(shard))
+    return shard
+
+def combine_shards(shards: list):
+    """
+    Concatenates the processed csv files of the shards, in season order, into the usual processed csv files
+    (mvps.csv, player_stats.csv, team_records.csv, adv_stats.csv and the other awards)
+    """
+    for data_dir in data_dirs:
+        processed_dir = data_dir / 'processed'
+        shard_files = {}
+        for shard in shards:
+            for csv_file in sorted((processed_dir / 'shards' / shard_name(shard)).glob('*.csv')):
+                shard_files.setdefault(csv_file.name, []).append(csv_file)
+
+        for file_name, csv_files in shard_files.items():
+            print(f'Combining {len(csv_files)} shards into {processed_dir / file_name}')
+            combined = pd.concat([pd.read_csv(csv_file) for csv_file in csv_files])
+            combined.to_csv(processed_dir / file_name, index=False)
+
+def run_backfill(start: int, end: int, n_jobs: int = 1, awards: list = None, download: bool = True):
+    """
+    Builds the dataset of an arbitrary range of seasons in per-decade shards. Finished shards are recorded in
+    data/backfill/manifest.json, so an interrupted backfill resumes with the unfinished shards only.
+
+    Downloads run one shard at a time to respect the crawl delay of Basketball Reference, while the
+    shards are parsed in parallel since parsing only reads local files.
+
+    Args:
+        start: first season, identified by the year the season ends, 1953 at the earliest
+        end: last season, included
+        n_jobs: number of shards parsed in parallel
+        awards: the awards to merge and clean, defaults to the MVP only
+        download: whether to download the pages, False to only rebuild from the already downloaded pages
+    """
+    from joblib import Parallel, delayed
+
+    if start < first_award_season:
+        raise ValueError(f'Backfills start in {first_award_season} at the earliest, the first season with award votes')
+
+    shards = decade_shards(start, end)
+    manifest = load_manifest()
+    for shard in shards:
+        manifest.setdefault(shard_name(shard), {'downloaded': False, 'parsed': False})
+
+    if download:
+        for shard in shards:
+            if manifest[shard_name(shard)]['downloaded']:
+                continue
+            print(f'Downloading seasons {shard[0]}-{shard[1]}')
+            if not download_shard(shard):
+                print(f'Some pages of seasons {shard[0]}-{shard[1]} failed, rerun the backfill to retry them')
+                continue
+            manifest[shard_name(shard)]['downloaded'] = True
+            save_manifest(manifest)
+
+    # Shards with failed pages are left for the next run instead of being parsed with missing pages
+    incomplete = [shard for shard in shards if download and not manifest[shard_name(shard)]['downloaded']]
+    pending = [shard for shard in shards if not manifest[shard_name(shard)]['parsed'] and shard not in incomplete]
+    parsed_shards = Parallel(n_jobs=n_jobs, return_as='generator')(delayed(parse_shard)(shard) for shard in pending)
+    for shard in parsed_shards:
+        print(f'Parsed seasons {shard[0]}-{shard[1]}')
+        manifest[shard_name(shard)]['parsed'] = True
+        save_manifest(manifest)
+
+    if incomplete:
+        print(f'Not merging, seasons {[shard_name(shard) for shard in incomplete]} are not fully downloaded')
+        return
+
+    combine_shards(shards)
+    for award in awards or ['mvp']:
+        merge_data(award)
+        clean_merged_df(award)
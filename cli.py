@@ -0,0 +1,268 @@
+import time
+
+# Taken before anything else is imported so the reported startup time covers the whole CLI
+startup_begin = time.perf_counter()
+
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+# Time spent importing each module lazily loaded by a subcommand
+import_times = {}
+
+
+def lazy_import(module_name: str):
+    """
+    Imports a module on demand and records how long the import took
+
+    Args:
+        module_name: name of the module to import, e.g. 'model'
+    Returns:
+        module: the imported module
+    """
+    begin = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_times[module_name] = time.perf_counter() - begin
+    return module
+
+
+def report_startup_time():
+    """
+    Prints the startup import time of the CLI to stderr, so it does not mix with the results on stdout
+    """
+    startup_seconds = time.perf_counter() - startup_begin
+    imports = ', '.join(f'{name} {seconds:.3f}s' for name, seconds in import_times.items())
+    print(f'Startup imports: {imports or "none"} (total {startup_seconds:.3f}s)', file=sys.stderr)
+
+
+def load_player_data(award: str):
+    """
+    Reads the cleaned player data of an award produced by the merge subcommand
+    """
+    pd = lazy_import('pandas')
+    data_treatment = lazy_import('data_treatment')
+    return pd.read_csv(data_treatment.player_data_save_path(award))
+
+
+def import_estimators(model_keys: list):
+    """
+    Imports the sklearn estimators of models ahead of the startup report. Training or unpickling a model
+    imports its estimator module (e.g. sklearn.ensemble), the slowest import of most subcommands, so the
+    reported startup time would leave it out otherwise
+    """
+    registry = lazy_import('registry')
+    lazy_import('sklearn.preprocessing')
+    for model_key in model_keys:
+        begin = time.perf_counter()
+        registry.model_registry[model_key].estimator()
+        import_times[f'{model_key} estimator'] = time.perf_counter() - begin
+
+
+def saved_model_keys(saved_model_paths: list):
+    """
+    Registry keys of the estimators of saved models, read from their file names, e.g. 'models/adaboost_2023.dat'.
+    Stacked ensembles hold base models of any registered estimator, blended by a linear regression
+    """
+    registry = lazy_import('registry')
+    model_keys = []
+    for path in saved_model_paths:
+        artifact = Path(path).stem.split('_')[0]
+        if artifact == 'stacked':
+            lazy_import('sklearn.linear_model')
+            model_keys.extend(registry.model_registry)
+        elif artifact in registry.model_registry:
+            model_keys.append(artifact)
+    return list(dict.fromkeys(model_keys))
+
+
+def download(args):
+    scraper = lazy_import('scraper')
+    report_startup_time()
+    scraper.download_mvp_votings()
+    scraper.download_player_stats()
+    scraper.download_team_records()
+    scraper.download_advanced_stats()
+
+
+def parse(args):
+    scraper = lazy_import('scraper')
+    report_startup_time()
+    scraper.parse_award_votings()
+    scraper.parse_player_stats()
+    scraper.parse_team_records()
+    scraper.parse_advanced_stats()
+
+
+def merge(args):
+    data_treatment = lazy_import('data_treatment')
+    report_startup_time()
+    data_treatment.merge_data(args.award)
+    data_treatment.clean_merged_df(args.award)
+
+
+def backfill(args):
+    backfill = lazy_import('backfill')
+    report_startup_time()
+    backfill.run_backfill(args.start, args.end, n_jobs=args.jobs, awards=args.awards, download=not args.skip_download)
+
+
+def train(args):
+    pd = lazy_import('pandas')
+    model = lazy_import('model')
+    player_data = load_player_data(args.award)
+    import_estimators(args.models)
+    report_startup_time()
+
+    metrics_df = pd.DataFrame()
+    for model_key in args.models:
+        metrics_df = model.train_model(model_key, player_data, metrics_df, args.years,
+                                       show_plots=args.plot, award=args.award)
+    print(metrics_df)
+
+
+def compare(args):
+    model = lazy_import('model')
+    player_data = load_player_data(args.award)
+    report_startup_time()
+    print(model.compare_models(player_data, args.models, args.years, args.award).to_string())
+
+
+def score(args):
+    model = lazy_import('model')
+    player_data = load_player_data(args.award)
+    import_estimators(saved_model_keys([args.model]))
+    report_startup_time()
+    print(model.score_model(player_data, args.model, args.year, args.top))
+
+
+def backtest(args):
+    model = lazy_import('model')
+    player_data = load_player_data(args.award)
+    import_estimators(saved_model_keys(args.models))
+    report_startup_time()
+    print(model.load_model(player_data, args.models, args.years, show_plots=args.plot))
+
+
+def explain(args):
+    explain = lazy_import('explain')
+    player_data = load_player_data(args.award)
+    import_estimators(saved_model_keys(args.models))
+    report_startup_time()
+    for saved_model_path in args.models:
+        importance_df = explain.permutation_importance(saved_model_path, player_data, args.years,
+                                                       n_repeats=args.repeats, n_jobs=args.jobs)
+        print(f'Permutation importance of {saved_model_path}')
+        print(importance_df.groupby('year').head(args.top).to_string(index=False))
+
+
+def simulate(args):
+    simulate = lazy_import('simulate')
+    player_data = load_player_data(args.award)
+    report_startup_time()
+    probabilities_df = simulate.mvp_probabilities(player_data, args.year, args.models, n_members=args.members,
+                                                  n_sims=args.sims, n_jobs=args.jobs, award=args.award)
+    print(probabilities_df.groupby('model').head(args.top).to_string(index=False))
+
+
+def stack(args):
+    pd = lazy_import('pandas')
+    stacking = lazy_import('stacking')
+    report_startup_time()
+
+    metrics_df = pd.DataFrame()
+    for year in args.years:
+        metrics_df, _ = stacking.fit_stacked_ensemble(year, args.models, metrics_df, award=args.award)
+    print(metrics_df)
+
+
+def build_parser():
+    """
+    Builds the argument parser with one subcommand per stage of the pipeline
+    """
+    parser = argparse.ArgumentParser(description='NBA MVP predictor')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # Every subcommand that reads the player data can run on another award race than the MVP
+    award_parser = argparse.ArgumentParser(add_help=False)
+    award_parser.add_argument('--award', default='mvp', help="award race, e.g. 'mvp', 'roy', 'dpoy', 'smoy' or 'mip'")
+
+    subparsers.add_parser('download', help='download raw HTML pages from Basketball Reference').set_defaults(func=download)
+    subparsers.add_parser('parse', help='parse the downloaded HTML pages into csv files').set_defaults(func=parse)
+    subparsers.add_parser('merge', help='merge and clean the parsed data into player_data.csv',
+                          parents=[award_parser]).set_defaults(func=merge)
+
+    backfill_parser = subparsers.add_parser('backfill', help='download, parse and merge any range of seasons in per-decade shards')
+    backfill_parser.add_argument('--start', type=int, default=1956, help='first season, 1953 at the earliest (the first award votes), the MVP was first awarded in 1956')
+    backfill_parser.add_argument('--end', type=int, default=2023)
+    backfill_parser.add_argument('--jobs', type=int, default=1, help='number of shards parsed in parallel')
+    backfill_parser.add_argument('--awards', nargs='+', default=['mvp'], help='awards to merge and clean')
+    backfill_parser.add_argument('--skip-download', action='store_true', help='only rebuild from the downloaded pages')
+    backfill_parser.set_defaults(func=backfill)
+
+    model_keys = list(lazy_import('registry').model_registry)
+
+    train_parser = subparsers.add_parser('train', help='train models, leaving out each of the given seasons',
+                                         parents=[award_parser])
+    train_parser.add_argument('--years', type=int, nargs='+', default=[2022])
+    train_parser.add_argument('--models', nargs='+', choices=model_keys, default=model_keys)
+    train_parser.add_argument('--plot', action='store_true', help='graph actual vs predicted MVP shares')
+    train_parser.set_defaults(func=train)
+
+    compare_parser = subparsers.add_parser('compare', help='compare accuracy and timing of models side by side',
+                                           parents=[award_parser])
+    compare_parser.add_argument('--years', type=int, nargs='+', default=[2022])
+    compare_parser.add_argument('--models', nargs='+', choices=model_keys,
+                                default=['adaboost', 'gradboost', 'histgradboost'])
+    compare_parser.set_defaults(func=compare)
+
+    score_parser = subparsers.add_parser('score', help='score a season with a saved model',
+                                         parents=[award_parser])
+    score_parser.add_argument('--model', type=Path, required=True, help="saved model, e.g. models/adaboost_2023.dat")
+    score_parser.add_argument('--year', type=int, required=True)
+    score_parser.add_argument('--top', type=int, default=3, help='number of MVP candidates to display')
+    score_parser.set_defaults(func=score)
+
+    backtest_parser = subparsers.add_parser('backtest', help='evaluate saved models against the given seasons',
+                                            parents=[award_parser])
+    backtest_parser.add_argument('--models', type=Path, nargs='+', required=True)
+    backtest_parser.add_argument('--years', type=int, nargs='+', required=True)
+    backtest_parser.add_argument('--plot', action='store_true', help='graph actual vs predicted MVP shares')
+    backtest_parser.set_defaults(func=backtest)
+
+    explain_parser = subparsers.add_parser('explain', help='permutation importance of saved models, saved in their metadata',
+                                           parents=[award_parser])
+    explain_parser.add_argument('--models', type=Path, nargs='+', required=True)
+    explain_parser.add_argument('--years', type=int, nargs='+', required=True)
+    explain_parser.add_argument('--repeats', type=int, default=10, help='number of shuffles of each feature')
+    explain_parser.add_argument('--jobs', type=int, default=-1, help='number of parallel workers')
+    explain_parser.add_argument('--top', type=int, default=10, help='number of features to display per season')
+    explain_parser.set_defaults(func=explain)
+
+    simulate_parser = subparsers.add_parser('simulate', help='MVP win and top 3 probabilities from bootstrap ensembles',
+                                            parents=[award_parser])
+    simulate_parser.add_argument('--year', type=int, required=True)
+    simulate_parser.add_argument('--models', nargs='+', choices=model_keys, default=model_keys)
+    simulate_parser.add_argument('--members', type=int, default=50, help='number of bootstrap members per model')
+    simulate_parser.add_argument('--sims', type=int, default=10000, help='number of simulated races')
+    simulate_parser.add_argument('--jobs', type=int, default=-1, help='number of parallel workers')
+    simulate_parser.add_argument('--top', type=int, default=5, help='number of players to display per model')
+    simulate_parser.set_defaults(func=simulate)
+
+    stack_parser = subparsers.add_parser('stack', help='stacked ensemble fitted on the cached out-of-fold predictions',
+                                         parents=[award_parser])
+    stack_parser.add_argument('--years', type=int, nargs='+', required=True)
+    stack_parser.add_argument('--models', nargs='+', choices=model_keys, default=None,
+                              help='base models, defaults to every model trained for the season')
+    stack_parser.set_defaults(func=stack)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+journal_path = Path('data') / 'crawl_journal.json'
+
+# Status of each (endpoint, year) page in the journal
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# Throttling and server errors are retried, other errors (e.g. 404) fail right away
+retry_statuses = {429, 500, 502, 503, 504}
+max_attempts = 5
+# Delay before the first retry in seconds, doubled at every attempt
+backoff_base = 3
+
+
+class CrawlError(Exception):
+    """
+    Raised when a page could not be downloaded, or did not contain its expected table, after every retry
+    """
+    def __init__(self, message: str, http_status: int = None, attempts: int = 0):
+        super().__init__(message)
+        self.http_status = http_status
+        self.attempts = attempts
+
+
+def load_journal():
+    """
+    Loads the crawl journal, a dictionary of '{endpoint}/{year}' to the status of the page
+    """
+    if not os.path.exists(journal_path):
+        return {}
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_journal(journal: dict):
+    """
+    Saves the crawl journal, replacing the previous one at once so an interruption cannot corrupt it
+    """
+    if not os.path.exists(journal_path.parent):
+        os.makedirs(journal_path.parent)
+    temp_path = journal_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(journal, f, indent=2, sort_keys=True)
+    os.replace(temp_path, journal_path)
+
+def checksum(content: str):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def has_table(content: str, table_id: str):
+    """
+    Checks that a page contains a table whose id starts with table_id, including tables inside HTML comments.
+    Throttling and error pages are served with a 200 status but do not contain the table.
+    """
+    return re.search(rf'<table[^>]*\sid="{re.escape(table_id)}', content) is not None
+
+def is_expected_page(content: str, expected_table):
+    """
+    Checks that a page contains its expected table, given either as a table id (or id prefix), or as a
+    function of the content of the page for pages whose tables vary, e.g. the awards of each season
+    """
+    if callable(expected_table):
+        return expected_table(content)
+    return has_table(content, expected_table)
+
+def record(journal: dict, endpoint: str, year: int, status: str, save_file: Path, http_status: int = None,
+           content_checksum: str = None, attempts: int = 0, error: str = None):
+    """
+    Records the status of a page in the journal and saves the journal
+    """
+    journal[f'{endpoint}/{year}'] = {'endpoint': endpoint,
+                                     'year': year,
+                                     'status': status,
+                                     'file': str(save_file),
+                                     'http_status': http_status,
+                                     'checksum': content_checksum,
+                                     'attempts': attempts,
+                                     'error': error,
+                                     'updated': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    save_journal(journal)
+
+def is_done(journal: dict, endpoint: str, year: int, save_file: Path):
+    """
+    Checks if a page was already downloaded, and that the saved file is still the one that was validated
+    """
+    entry = journal.get(f'{endpoint}/{year}')
+    if entry is None or entry['status'] != DONE or not os.path.exists(save_file):
+        return False
+    with open(save_file, 'r', encoding='utf-8') as f:
+        return checksum(f.read()) == entry['checksum']
+
+def adopt_downloaded_page(journal: dict, endpoint: str, year: int, save_file: Path, expected_table):
+    """
+    Records a page downloaded before the crawl journal existed as done, if it contains its expected table,
+    so upgrading does not download every season again
+
+    Returns:
+        adopted: whether the page was recorded as done
+    """
+    if f'{endpoint}/{year}' in journal or not os.path.exists(save_file):
+        return False
+    with open(save_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if not is_expected_page(content, expected_table):
+        return False
+    record(journal, endpoint, year, DONE, save_file, content_checksum=checksum(content))
+    return True
+
+def retry_after_seconds(response, attempt: int):
+    """
+    Seconds to wait before retrying a request. Honors the Retry-After header of throttled responses,
+    given either in seconds or as a date, and otherwise backs off exponentially.
+    """
+    backoff = backoff_base * 2 ** attempt
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if not retry_after:
+        return backoff
+    if retry_after.strip().isdigit():
+        return int(retry_after)
+    try:
+        return max(0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return backoff
+
+def write_page(save_file: Path, content: str):
+    """
+    Writes a validated page, replacing the previous file at once so a partial page is never left on disk
+    """
+    temp_file = Path(f'{save_file}.tmp')
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_file, save_file)
+
+def fetch_page(url: str, expected_table):
+    """
+    Downloads a page with requests, retrying throttled, failed and invalid responses with exponential backoff
+
+    Args:
+        url: url of the page
+        expected_table: id (or id prefix) of the table the page must contain, or a function checking
+                        the content of the page, see is_expected_page
+    Returns:
+        content: the content of the page
+        http_status: the status of the response
+        attempts: the number of requests that were made
+    """
+    import requests
+
+    response = None
+    error = None
+    for attempt in range(max_attempts):
+        if attempt > 0:
+            wait = retry_after_seconds(response, attempt - 1)
+            print(f'Retrying {url} in {wait:.0f}s ({error})')
+            time.sleep(wait)
+
+        try:
+            response = requests.get(url, timeout=30)
+        except requests.RequestException as e:
+            response, error = None, str(e)
+            continue
+
+        if response.status_code in retry_statuses:
+            error = f'HTTP {response.status_code}'
+            continue
+        if response.status_code != 200:
+            raise CrawlError(f'HTTP {response.status_code}', response.status_code, attempt + 1)
+
+        content = response.content.decode('utf-8')
+        if is_expected_page(content, expected_table):
+            return content, response.status_code, attempt + 1
+        error = f'table {expected_table} not found' if isinstance(expected_table, str) else 'expected table not found'
+
+    http_status = response.status_code if response is not None else None
+    raise CrawlError(error, http_status, max_attempts)
+
+def crawl_page(journal: dict, endpoint: str, year: int, url: str, save_file: Path, expected_table):
+    """
+    Downloads a page unless the journal records it as done (or it was downloaded before the journal
+    existed, see adopt_downloaded_page), validates that it contains its table,
+    saves it and records the outcome in the journal
+
+    Args:
+        journal: the crawl journal, see load_journal
+        endpoint: kind of page, e.g. 'awards'
+        year: season of the page
+        url: url of the page
+        save_file: path the page is saved to
+        expected_table: id (or id prefix) of the table the page must contain, or a function checking
+                        the content of the page, see is_expected_page
+    Returns:
+        requested: whether a request was made, so the caller knows to respect the crawl delay
+    """
+    if is_done(journal, endpoint, year, save_file) or \
+            adopt_downloaded_page(journal, endpoint, year, save_file, expected_table):
+        print(f'Skipping {endpoint} from {year}, already downloaded')
+        return False
+
+    record(journal, endpoint, year, PENDING, save_file)
+    try:
+        content, http_status, attempts = fetch_page(url, expected_table)
+    except CrawlError as e:
+        print(f'Failed to download {endpoint} from {year}: {e}')
+        record(journal, endpoint, year, FAILED, save_file, e.http_status, attempts=e.attempts, error=str(e))
+        return True
+
+    write_page(save_file, content)
+    record(journal, endpoint, year, DONE, save_file, http_status, checksum(content), attempts)
+    return True
@@ -2,15 +2,76 @@ import os
 import pandas as pd
 from pathlib import Path
 
+from franchises import franchise_abbreviations
+
 mvp_votings_save_path = Path('data') / 'mvp_votings' / 'processed' / 'mvps.csv'
 player_stats_save_path = Path('data') / 'player_stats' / 'processed' / 'player_stats.csv'
 team_record_save_path = Path('data') / 'team_records' / 'processed' / 'team_records.csv'
 adv_stats_save_path = Path('data') / 'advanced_stats' / 'processed' / 'adv_stats.csv'
 merged_save_path = Path('data') / 'merged'
+player_ids_save_path = Path('data') / 'players' / 'player_ids.csv'
+
+# Every award is stored like the MVP, with the award as a suffix, e.g. roy.csv and player_data_roy.csv.
+# The MVP files keep their original names
+def award_votings_save_path(award: str = 'mvp'):
+    return mvp_votings_save_path if award == 'mvp' else mvp_votings_save_path.parent / f'{award}.csv'
+
+def uncleaned_merged_save_path(award: str = 'mvp'):
+    return merged_save_path / ('uncleaned_merged.csv' if award == 'mvp' else f'uncleaned_merged_{award}.csv')
+
+def player_data_save_path(award: str = 'mvp'):
+    return merged_save_path / ('player_data.csv' if award == 'mvp' else f'player_data_{award}.csv')
+
+def build_player_ids(*dfs: pd.DataFrame):
+    """
+    Builds the dictionary of Basketball Reference player slugs to compact integer player IDs.
+    IDs already saved in player_ids.csv are kept, so a player keeps the same ID when new seasons are added.
+
+    Args:
+        dfs: parsed dataframes with a 'player_slug' column
+    Returns:
+        player_ids: dictionary of player slug to integer player ID
+    """
+    player_ids = {}
+    if os.path.exists(player_ids_save_path):
+        saved_ids = pd.read_csv(player_ids_save_path)
+        player_ids = dict(zip(saved_ids['player_slug'], saved_ids['player_id']))
 
-def merge_data():
+    slugs = set()
+    for df in dfs:
+        slugs.update(df['player_slug'].dropna())
+    next_id = max(player_ids.values(), default=-1) + 1
+    for slug in sorted(slugs - player_ids.keys()):
+        player_ids[slug] = next_id
+        next_id += 1
+
+    if not os.path.exists(player_ids_save_path.parent):
+        os.makedirs(player_ids_save_path.parent)
+    pd.DataFrame({'player_slug': list(player_ids.keys()),
+                  'player_id': list(player_ids.values())}).to_csv(player_ids_save_path, index=False)
+    return player_ids
+
+def add_player_ids(df: pd.DataFrame, player_ids: dict):
+    """
+    Replaces the 'player_slug' column with an integer 'player_id' column.
+    Rows without a player link, such as the league average row, are dropped.
+
+    Args:
+        df: parsed dataframe with a 'player_slug' column
+        player_ids: dictionary of player slug to integer player ID
+    Returns:
+        df: the dataframe keyed by 'player_id'
     """
-    Does minimal cleaning of player stats and team records data and merges them
+    df = df[df['player_slug'].notna()].copy()
+    df['player_id'] = df['player_slug'].map(player_ids).astype('int32')
+    return df.drop(columns=['player_slug'])
+
+def merge_data(award: str = 'mvp'):
+    """
+    Does minimal cleaning of player stats and team records data and merges them with the votings of an award
+
+    Args:
+        award: the award whose votings are merged, e.g. 'mvp', 'roy', 'dpoy', 'smoy' or 'mip'
     """
     
     # Adds column to team_records dataframe that indicates if the team made the playoffs
@@ -26,34 +87,32 @@ def merge_data():
         team_name = team_name.replace('*', '').rstrip()
         team_records.at[idx, 'Tm'] = team_name
 
-    # Replaces CHO with CHH (both team abbreviations represent the Charlottle Hornets, just in different years)
+    player_stats = pd.read_csv(player_stats_save_path)
+    adv_stats = pd.read_csv(adv_stats_save_path)
+    award_votings = pd.read_csv(award_votings_save_path(award))
+
+    # Every join below is on the integer (player_id, year) key instead of the player name, so names
+    # with Hall of Fame asterisks still match and players sharing a name do not collide
+    player_ids = build_player_ids(player_stats, adv_stats, award_votings)
+    player_stats = add_player_ids(player_stats, player_ids)
+    adv_stats = add_player_ids(adv_stats, player_ids)
+    award_votings = add_player_ids(award_votings, player_ids)
+
     # Removes players with TOT (Total) meaning they have been traded during that season.
+    # Newer pages label these rows with the number of teams instead, e.g. 2TM
     #   *Historically, all players who have been traded in the middle of the season have never won MVP
-    player_stats = pd.read_csv(player_stats_save_path)
-    player_stats['Tm'].replace('CHO', 'CHH', inplace=True)
-    player_stats = player_stats[player_stats.Tm != 'TOT']
-    
-    # Creates mapping for the full name of the team and the abbreviations. We will be using the abbreviations
-    team_names = sorted(team_records['Tm'].unique())
-    team_abbreviations = sorted(player_stats['Tm'].unique())
-    
-    # Some of the sorted abbreviations do not match up with the full team names, so we fix it here
-    if 'NOK' in team_abbreviations and 'NOP' in team_abbreviations:
-        nok_index, nop_index = team_abbreviations.index('NOK'), team_abbreviations.index('NOP')
-        team_abbreviations[nop_index], team_abbreviations[nok_index] = team_abbreviations[nok_index], team_abbreviations[nop_index]
-    if 'WSB' in team_abbreviations and 'WAS' in team_abbreviations:
-        wsb_index, was_index = team_abbreviations.index('WSB'), team_abbreviations.index('WAS')
-        team_abbreviations[wsb_index], team_abbreviations[was_index] = team_abbreviations[was_index], team_abbreviations[wsb_index]
-    team_name_map = dict(zip(team_names, team_abbreviations))
-
-    # Replaces the team_records team names with the abbreviations
-    cleaned_team_record_names = []
-    for team_name in team_records['Tm']:
-        cleaned_team_record_names.append(team_name_map[team_name])
-    team_records['Tm'] = cleaned_team_record_names
+    player_stats = player_stats[~player_stats.Tm.str.fullmatch(r'TOT|\dTM')]
 
-    adv_stats = pd.read_csv(adv_stats_save_path)
-    adv_stats = adv_stats.drop(columns=['Rk', 'Pos', 'Age', 'Tm', 'G', 'MP'])
+    # Replaces the team_records team names with the abbreviations used in player_stats. The mapping is
+    # year-aware since names are reused by different abbreviations, e.g. the Charlotte Hornets are CHH
+    # until 2002 and CHO from 2015 (see franchises.py)
+    team_records['Tm'] = franchise_abbreviations(team_records['Tm'], team_records['year'])
+
+    # Traded players have one advanced stats row per team plus a TOT (or 2TM) row for the whole season.
+    # Only the whole season row is kept, so each player season has a single row of advanced stats
+    season_total = adv_stats.Tm.str.fullmatch(r'TOT|\dTM')
+    adv_stats = adv_stats[season_total | ~adv_stats.duplicated(['player_id', 'year'], keep=False)]
+    adv_stats = adv_stats.drop(columns=['Rk', 'Player', 'Pos', 'Age', 'Tm', 'G', 'MP'])
     
     # Merge together the team_records and player_stats
     pstats_and_team_records = pd.merge(player_stats,
@@ -63,23 +122,42 @@ def merge_data():
     
     adv_stats_merged = pd.merge(pstats_and_team_records,
                                 adv_stats,
-                                on=['Player', 'year'],
-                                how='left')
+                                on=['player_id', 'year'],
+                                how='left',
+                                validate='many_to_one')
 
-    # Merge the MVP votings data into team_records and player_stats
-    mvp_votings = pd.read_csv(mvp_votings_save_path)
+    # Merge the award votings data into team_records and player_stats
     merged_df = pd.merge(adv_stats_merged,
-                         mvp_votings[['Player', 'year', 'Share', 'Rank', 'First']],
-                         on=['Player', 'year'],
-                         how='left')
+                         award_votings[['player_id', 'year', 'Share', 'Rank', 'First']],
+                         on=['player_id', 'year'],
+                         how='left',
+                         validate='many_to_one')
     
     
     if not os.path.exists(merged_save_path):
         os.makedirs(merged_save_path)
-    merged_df.to_csv(merged_save_path / 'uncleaned_merged.csv', index=False)
+    merged_df.to_csv(uncleaned_merged_save_path(award), index=False)
 
-def clean_merged_df():
+def is_rookie(merged_df: pd.DataFrame):
     """
+    Flags the rows of each player's first season. Players of the first season of the data may have played
+    before it, so none of them is flagged.
+
+    Args:
+        merged_df: the merged player data
+    Returns:
+        rookie: boolean series matching up with the rows of merged_df
+    """
+    first_season = merged_df.groupby('player_id')['year'].transform('min')
+    return (merged_df['year'] == first_season) & (merged_df['year'] > merged_df['year'].min())
+
+def clean_merged_df(award: str = 'mvp'):
+    """
+    Filters the merged data down to the candidates of an award and saves the cleaned player data
+
+    Args:
+        award: the award whose merged data is cleaned, e.g. 'mvp', 'roy', 'dpoy', 'smoy' or 'mip'
+
     Establishing the minimum criteria for an MVP (via StatMuse)
         Games Played (GP)    | 49
         PTS and FGA          | 13.8 & 10.9
@@ -93,16 +171,32 @@ def clean_merged_df():
         There has only been one MVP that did not make the playoffs
         (Handled earlier) Players who have been traded while the season was ongoing has never won MVP
 
+    Criteria of the other awards:
+        ROY                  | first season of the player
+        Sixth Man (SMOY)     | started less than half of his games
+        Every other award    | 30 games played
     """
-    merged_df = pd.read_csv(merged_save_path / 'uncleaned_merged.csv')
-    merged_df = merged_df[merged_df.G >= 49]
-    merged_df = merged_df[merged_df.PTS >= 13.8]
-    merged_df = merged_df[merged_df.FGA >= 10.9]
-    merged_df = merged_df[merged_df.TRB >= 3.3]
-    merged_df = merged_df[merged_df.AST >= 1.3]
-    merged_df = merged_df[merged_df['FG%'] >= 0.378]
-    merged_df = merged_df[merged_df.MP >= 30.4]
-    merged_df = merged_df[merged_df.PER >= 18.1]
+    merged_df = pd.read_csv(uncleaned_merged_save_path(award))
+    if award == 'mvp':
+        merged_df = merged_df[merged_df.G >= 49]
+        merged_df = merged_df[merged_df.PTS >= 13.8]
+        merged_df = merged_df[merged_df.FGA >= 10.9]
+        merged_df = merged_df[merged_df.TRB >= 3.3]
+        merged_df = merged_df[merged_df.AST >= 1.3]
+        merged_df = merged_df[merged_df['FG%'] >= 0.378]
+        merged_df = merged_df[merged_df.MP >= 30.4]
+        merged_df = merged_df[merged_df.PER >= 18.1]
+    elif award == 'roy':
+        merged_df = merged_df[is_rookie(merged_df)]
+    elif award == 'smoy':
+        merged_df = merged_df[merged_df.GS * 2 < merged_df.G]
+    else:
+        merged_df = merged_df[merged_df.G >= 30]
+
+    # Only the seasons in which the award was voted on are kept, otherwise the seasons before the award
+    # existed (e.g. the DPOY before 1983) would be races where every player received no votes
+    voted_seasons = pd.read_csv(award_votings_save_path(award))['year'].unique()
+    merged_df = merged_df[merged_df['year'].isin(voted_seasons)]
 
     # Player name cleanup
     player_names = []
@@ -117,14 +211,15 @@ def clean_merged_df():
     # Dropping low-information columns
     merged_df.drop(columns=['Rk', 'playoffs', 'Tm', 'Pos'], inplace=True)
 
-    merged_df.rename(columns={'Share': 'mvp_share', 'Rank': 'mvp_rank', 'First': 'first_place_votes'}, inplace=True)
+    merged_df.rename(columns={'Share': f'{award}_share', 'Rank': f'{award}_rank', 'First': 'first_place_votes'}, inplace=True)
     merged_df.columns = merged_df.columns.str.lower()
     
     # Filling columns that have NaN values with '0'
     #   - 3p%: Some players (Big men) do not shoot 3 pointers
-    #   - mvp_share: Number of received MVP votes / Number of total MVP Votes
-    #   - mvp_rank: final MVP rankings
+    #   - {award}_share: Number of received votes / Number of total votes, e.g. mvp_share
+    #   - {award}_rank: final award rankings
     #   - first_place_votes: number of first place votes
     merged_df.fillna(0, inplace=True)
+    merged_df.sort_values(['player_id', 'year'], inplace=True)
     print(merged_df.info())
-    merged_df.to_csv(merged_save_path / 'player_data.csv', index=False)
+    merged_df.to_csv(player_data_save_path(award), index=False)
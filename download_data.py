@@ -1,6 +1,8 @@
-from scraper import *
-from model import *
-from data_treatment import *
+from scraper import download_mvp_votings, parse_mvp_votings
+from scraper import download_player_stats, parse_player_stats
+from scraper import download_team_records, parse_team_records
+from scraper import download_advanced_stats, parse_advanced_stats
+from data_treatment import merge_data, clean_merged_df
 
 def download_data():
     """
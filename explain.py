@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from model import load_model_bundle, save_model_bundle, prepare_test_features, split_features
+
+
+def season_baseline(bundle: dict, data: pd.DataFrame, year: int):
+    """
+    Scales the features of a season and predicts its baseline MVP shares
+
+    Args:
+        bundle: the loaded model bundle
+        data: the cleaned player data
+        year: the season to explain
+    Returns:
+        X_te: read-only scaled features of the season
+        y_te: actual MVP shares of the season
+        baseline_pred: predicted MVP shares of the season without any permutation
+    """
+    X_te, y_te, _ = prepare_test_features(bundle, data, year)
+    X_te = np.ascontiguousarray(X_te, dtype=np.float64)
+    X_te.setflags(write=False)
+    y_te = np.asarray(y_te, dtype=np.float64)
+    return X_te, y_te, bundle['model'].predict(X_te)
+
+def permuted_rmse(model, X: np.array, y: np.array, feature_idx: int, seed: int):
+    """
+    Shuffles a single feature of the season and scores the model on it
+
+    Args:
+        model: the fitted model
+        X: read-only scaled features of the season, shared between the workers
+        y: actual MVP shares of the season
+        feature_idx: column of the feature to shuffle
+        seed: seed of this repeat of the shuffle
+    Returns:
+        feature_idx, rmse: the shuffled feature and the RMSE of the model with that feature shuffled
+    """
+    rng = np.random.default_rng(seed)
+    X_permuted = np.array(X)
+    X_permuted[:, feature_idx] = rng.permutation(X_permuted[:, feature_idx])
+    y_pred = model.predict(X_permuted)
+    return feature_idx, np.sqrt(np.mean((y - y_pred) ** 2))
+
+def permutation_importance(saved_model_path: Path, data: pd.DataFrame, years: list, n_repeats: int = 10,
+                           n_jobs: int = -1, seed: int = 0):
+    """
+    Computes the permutation importance of every feature of a saved model for each season, and writes
+    the results into the 'permutation_importance' metadata of the saved model.
+
+    The importance of a feature is the increase in RMSE when the feature is shuffled within the season.
+    The (feature, repeat) permutations run in parallel, and the scaled feature matrix is memory-mapped
+    read-only so the workers share it instead of each receiving a copy.
+
+    Args:
+        saved_model_path: path of the saved model, e.g. 'models/adaboost_2023.dat'
+        data: the cleaned player data
+        years: the seasons to explain
+        n_repeats: number of shuffles of each feature
+        n_jobs: number of parallel workers, -1 uses every core
+        seed: seed of the first shuffle
+    Returns:
+        importance_df: mean and standard deviation of the importance of each feature and season,
+                       sorted from most to least important
+    """
+    from joblib import Parallel, delayed
+
+    bundle = load_model_bundle(saved_model_path)
+    features = bundle['features'] or list(split_features(data, years[0])[0].columns)
+    model = bundle['model']
+
+    importance = bundle['metadata'].setdefault('permutation_importance', {})
+    dfs = []
+    for year in years:
+        X_te, y_te, baseline_pred = season_baseline(bundle, data, year)
+        baseline_rmse = np.sqrt(np.mean((y_te - baseline_pred) ** 2))
+
+        with Parallel(n_jobs=n_jobs, max_nbytes=0, mmap_mode='r') as parallel:
+            results = parallel(delayed(permuted_rmse)(model, X_te, y_te, feature_idx, seed + repeat)
+                               for feature_idx in range(len(features))
+                               for repeat in range(n_repeats))
+
+        increases = np.zeros((len(features), n_repeats))
+        repeats_done = np.zeros(len(features), dtype=int)
+        for feature_idx, rmse in results:
+            increases[feature_idx, repeats_done[feature_idx]] = rmse - baseline_rmse
+            repeats_done[feature_idx] += 1
+
+        df = pd.DataFrame({'feature': features,
+                           'year': year,
+                           'importance_mean': increases.mean(axis=1),
+                           'importance_std': increases.std(axis=1)})
+        dfs.append(df)
+        importance[year] = {'baseline_rmse': baseline_rmse,
+                            'n_repeats': n_repeats,
+                            'importances': df[['feature', 'importance_mean', 'importance_std']].to_dict('records')}
+
+    save_model_bundle(bundle, saved_model_path)
+    importance_df = pd.concat(dfs)
+    return importance_df.sort_values(['year', 'importance_mean'], ascending=[True, False]).reset_index(drop=True)
+
+def importance_report(saved_model_path: Path):
+    """
+    Reads the permutation importances saved in the metadata of a model
+
+    Args:
+        saved_model_path: path of the saved model, e.g. 'models/adaboost_2023.dat'
+    Returns:
+        importance_df: mean and standard deviation of the importance of each feature and season
+    """
+    bundle = load_model_bundle(saved_model_path)
+    dfs = []
+    for year, result in bundle['metadata'].get('permutation_importance', {}).items():
+        df = pd.DataFrame(result['importances'])
+        df.insert(1, 'year', year)
+        dfs.append(df)
+    if not dfs:
+        return pd.DataFrame(columns=['feature', 'year', 'importance_mean', 'importance_std'])
+    importance_df = pd.concat(dfs)
+    return importance_df.sort_values(['year', 'importance_mean'], ascending=[True, False]).reset_index(drop=True)
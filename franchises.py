@@ -0,0 +1,111 @@
+import pandas as pd
+
+# Team names of the standings pages and the abbreviations used in the player stats, with the first and
+# last season (year the season ends) the name was used. None means the name is still in use.
+# Names can come back with a different abbreviation, e.g. the Charlotte Hornets are CHH until 2002 and CHO
+# from 2015, and the Baltimore Bullets of the 1950s (BLB) are not the franchise of the 1960s (BAL).
+franchises = [
+    ('Tri-Cities Blackhawks', 'TRI', 1950, 1951),
+    ('Milwaukee Hawks', 'MLH', 1952, 1955),
+    ('St. Louis Hawks', 'STL', 1956, 1968),
+    ('Atlanta Hawks', 'ATL', 1969, None),
+    ('Boston Celtics', 'BOS', 1947, None),
+    ('New York Nets', 'NYN', 1977, 1977),
+    ('New Jersey Nets', 'NJN', 1978, 2012),
+    ('Brooklyn Nets', 'BRK', 2013, None),
+    ('Charlotte Hornets', 'CHH', 1989, 2002),
+    ('Charlotte Bobcats', 'CHA', 2005, 2014),
+    ('Charlotte Hornets', 'CHO', 2015, None),
+    ('Chicago Bulls', 'CHI', 1967, None),
+    ('Cleveland Cavaliers', 'CLE', 1971, None),
+    ('Dallas Mavericks', 'DAL', 1981, None),
+    ('Denver Nuggets', 'DNN', 1950, 1950),
+    ('Denver Nuggets', 'DEN', 1977, None),
+    ('Fort Wayne Pistons', 'FTW', 1949, 1957),
+    ('Detroit Pistons', 'DET', 1958, None),
+    ('Philadelphia Warriors', 'PHW', 1947, 1962),
+    ('San Francisco Warriors', 'SFW', 1963, 1971),
+    ('Golden State Warriors', 'GSW', 1972, None),
+    ('San Diego Rockets', 'SDR', 1968, 1971),
+    ('Houston Rockets', 'HOU', 1972, None),
+    ('Indiana Pacers', 'IND', 1977, None),
+    ('Buffalo Braves', 'BUF', 1971, 1978),
+    ('San Diego Clippers', 'SDC', 1979, 1984),
+    ('Los Angeles Clippers', 'LAC', 1985, None),
+    ('Minneapolis Lakers', 'MNL', 1949, 1960),
+    ('Los Angeles Lakers', 'LAL', 1961, None),
+    ('Vancouver Grizzlies', 'VAN', 1996, 2001),
+    ('Memphis Grizzlies', 'MEM', 2002, None),
+    ('Miami Heat', 'MIA', 1989, None),
+    ('Milwaukee Bucks', 'MIL', 1969, None),
+    ('Minnesota Timberwolves', 'MIN', 1990, None),
+    ('New Orleans Hornets', 'NOH', 2003, 2005),
+    ('New Orleans/Oklahoma City Hornets', 'NOK', 2006, 2007),
+    ('New Orleans Hornets', 'NOH', 2008, 2013),
+    ('New Orleans Pelicans', 'NOP', 2014, None),
+    ('New York Knicks', 'NYK', 1947, None),
+    ('Seattle SuperSonics', 'SEA', 1968, 2008),
+    ('Oklahoma City Thunder', 'OKC', 2009, None),
+    ('Orlando Magic', 'ORL', 1990, None),
+    ('Syracuse Nationals', 'SYR', 1950, 1963),
+    ('Philadelphia 76ers', 'PHI', 1964, None),
+    ('Phoenix Suns', 'PHO', 1969, None),
+    ('Portland Trail Blazers', 'POR', 1971, None),
+    ('Rochester Royals', 'ROC', 1949, 1957),
+    ('Cincinnati Royals', 'CIN', 1958, 1972),
+    ('Kansas City-Omaha Kings', 'KCO', 1973, 1975),
+    ('Kansas City Kings', 'KCK', 1976, 1985),
+    ('Sacramento Kings', 'SAC', 1986, None),
+    ('San Antonio Spurs', 'SAS', 1977, None),
+    ('Toronto Raptors', 'TOR', 1996, None),
+    ('New Orleans Jazz', 'NOJ', 1975, 1979),
+    ('Utah Jazz', 'UTA', 1980, None),
+    ('Chicago Packers', 'CHP', 1962, 1962),
+    ('Chicago Zephyrs', 'CHZ', 1963, 1963),
+    ('Baltimore Bullets', 'BAL', 1964, 1973),
+    ('Capital Bullets', 'CAP', 1974, 1974),
+    ('Washington Bullets', 'WSB', 1975, 1997),
+    ('Washington Wizards', 'WAS', 1998, None),
+    # Defunct franchises of the BAA and the early NBA
+    ('Anderson Packers', 'AND', 1950, 1950),
+    ('Baltimore Bullets', 'BLB', 1948, 1955),
+    ('Chicago Stags', 'CHS', 1947, 1950),
+    ('Cleveland Rebels', 'CLR', 1947, 1947),
+    ('Detroit Falcons', 'DTF', 1947, 1947),
+    ('Indianapolis Jets', 'INJ', 1949, 1949),
+    ('Indianapolis Olympians', 'INO', 1950, 1953),
+    ('Pittsburgh Ironmen', 'PIT', 1947, 1947),
+    ('Providence Steamrollers', 'PRO', 1947, 1949),
+    ('Sheboygan Red Skins', 'SHE', 1950, 1950),
+    ('St. Louis Bombers', 'STB', 1947, 1950),
+    ('Toronto Huskies', 'TRH', 1947, 1947),
+    ('Washington Capitols', 'WSC', 1947, 1951),
+    ('Waterloo Hawks', 'WAT', 1950, 1950),
+]
+
+def franchise_abbreviations(team_names: pd.Series, seasons: pd.Series):
+    """
+    Maps the full team names of the standings to the abbreviations of the player stats, using the
+    name that was in use in each season
+
+    Args:
+        team_names: full team names, e.g. 'Charlotte Hornets'
+        seasons: the season of each team name
+    Returns:
+        abbreviations: the abbreviation of each team name, e.g. 'CHH' in 2000 and 'CHO' in 2020
+    """
+    franchise_df = pd.DataFrame(franchises, columns=['Tm', 'abbreviation', 'first_season', 'last_season'])
+    franchise_df['last_season'] = franchise_df['last_season'].fillna(seasons.max()).astype(int)
+
+    teams = pd.DataFrame({'Tm': team_names.to_numpy(), 'year': seasons.to_numpy()})
+    teams['row'] = range(len(teams))
+    matches = pd.merge(teams, franchise_df, on='Tm', how='inner')
+    matches = matches[(matches['year'] >= matches['first_season']) & (matches['year'] <= matches['last_season'])]
+
+    unmapped = teams[~teams['row'].isin(matches['row'])]
+    if not unmapped.empty:
+        missing = sorted(set(zip(unmapped['Tm'], unmapped['year'])))
+        raise ValueError(f'No franchise abbreviation for {missing}, add them to franchises.py')
+
+    abbreviations = matches.set_index('row')['abbreviation'].sort_index()
+    return pd.Series(abbreviations.to_numpy(), index=team_names.index)
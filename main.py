@@ -1,5 +1,5 @@
 import pandas as pd
-from model import *
+from model import svm_model, random_forest_model, elastic_net_model, adaboost_model, gradientboost_model
 from pathlib import Path
 
 def main():
@@ -3,22 +3,32 @@ import pandas as pd
 from pathlib import Path
 import pickle
 import os
+import time
 
-import matplotlib.pyplot as plt
+from registry import model_registry
 
-from sklearn.svm import SVR
-from sklearn.model_selection import GridSearchCV
-from sklearn.linear_model import ElasticNet
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.ensemble import AdaBoostRegressor
-from sklearn.ensemble import GradientBoostingRegressor
-
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_squared_error, r2_score
+# matplotlib and the sklearn estimators are imported inside the functions that use them,
+# so that importing this module (e.g. from cli.py to score a season) stays fast
 
 model_path = Path('models')
 
-def get_metrics(y_test: pd.Series, y_pred: np.array, metrics_df: pd.DataFrame, model: str, year: int):
+def non_feature_columns(award: str = 'mvp'):
+    """
+    Columns of the player data of an award that are not used as features
+    """
+    return [f'{award}_share', f'{award}_rank', 'first_place_votes', 'year', 'player', 'player_id']
+
+def model_file(artifact: str, year: int, award: str = 'mvp'):
+    """
+    Path of a saved model, e.g. 'models/adaboost_2023.dat'. Models of the other awards have the award
+    in their name, e.g. 'models/adaboost_roy_2023.dat'
+    """
+    if award == 'mvp':
+        return model_path / f'{artifact}_{year}.dat'
+    return model_path / f'{artifact}_{award}_{year}.dat'
+
+def get_metrics(y_test: pd.Series, y_pred: np.array, metrics_df: pd.DataFrame, model: str, year: int,
+                timings: dict = None):
     """
     Obtains metrics for given model
     Args:
@@ -27,10 +37,13 @@ def get_metrics(y_test: pd.Series, y_pred: np.array, metrics_df: pd.DataFrame, m
         metrics_df: overall metrics dataframe for all models
         model: name of the model
         year: the year tested
+        timings: optional columns to add to the row, such as the fit time of the model
     Returns:
         metrics_df: the overall metrics dataframe for all the models so far, 
                     with a row representing the new data added.
     """
+    from sklearn.metrics import mean_squared_error, r2_score
+
     rmse = np.sqrt(mean_squared_error(y_test, y_pred))
     r2 = r2_score(y_test, y_pred)
     
@@ -38,13 +51,33 @@ def get_metrics(y_test: pd.Series, y_pred: np.array, metrics_df: pd.DataFrame, m
                     'Year': [year],
                     'RMSE': [rmse],
                     'R2': [r2]}
+    if timings:
+        dict_metrics.update({column: [value] for column, value in timings.items()})
     
     curr_metrics = pd.DataFrame(data=dict_metrics)
     metrics_df = pd.concat([metrics_df, curr_metrics])
 
     return metrics_df
 
-def display_mvp_race_results(actual: pd.Series, predicted: np.array, model: str, player_names: list):
+def plot_predictions(actual: pd.Series, predicted: np.array, title: str):
+    """
+    Graphs a actual vs predicted scatter plot
+
+    Args:
+        actual: actual results of MVP shares
+        predicted: predicted results of MVP shares
+        title: title of the plot, usually the model name
+    """
+    import matplotlib.pyplot as plt
+
+    plt.scatter(list(range(len(predicted))), predicted, label='predicted')
+    plt.scatter(list(range(len(actual))), actual, label='actual')
+    plt.legend()
+    plt.title(title)
+    plt.show()
+
+def display_mvp_race_results(actual: pd.Series, predicted: np.array, model: str, player_names: list,
+                             award: str = 'mvp'):
     """
     Displays the top 3 leaders in MVP Share vs the top 3 leaders in a given model
 
@@ -53,18 +86,20 @@ def display_mvp_race_results(actual: pd.Series, predicted: np.array, model: str,
         predicted: predicted results of MVP shares (same as y_pred)
         model: model used to achieve the predicted results
         player_names: list of player names matching up with 'actual' and 'predicted'
+        award: the award of the race, used in the column labels, e.g. 'ROY Share'
     Returns:
         None. Prints out results of top 3 leaders in MVP Share, actual vs predicted.
     """
+    share = f'{award.upper()} Share'
     display_df_actual = pd.DataFrame()
     display_df_pred = pd.DataFrame()
     actual = list(actual)
     for i in range(len(actual)):
         mvp_shares_actual = {'Player (Actual)': [player_names[i]],
-                             'MVP Share (Actual)': [actual[i]],
+                             f'{share} (Actual)': [actual[i]],
                             }
         mvp_shares_pred = {f'Player ({model})': [player_names[i]],
-                           f'MVP Share ({model})': [predicted[i]]
+                           f'{share} ({model})': [predicted[i]]
                            }
         
         curr_race_actual = pd.DataFrame(data=mvp_shares_actual)
@@ -73,310 +108,284 @@ def display_mvp_race_results(actual: pd.Series, predicted: np.array, model: str,
         curr_race_pred = pd.DataFrame(data=mvp_shares_pred)
         display_df_pred = pd.concat([display_df_pred, curr_race_pred])
 
-    display_df_actual = display_df_actual.sort_values('MVP Share (Actual)', ascending=False)
-    display_df_pred = display_df_pred.sort_values(f'MVP Share ({model})', ascending=False)
+    display_df_actual = display_df_actual.sort_values(f'{share} (Actual)', ascending=False)
+    display_df_pred = display_df_pred.sort_values(f'{share} ({model})', ascending=False)
     
     display_df = pd.concat([display_df_actual.head(3), display_df_pred.head(3)], axis=1)
     print(display_df.head(3))
 
-def svm_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+def split_features(data: pd.DataFrame, test_year: int, award: str = 'mvp'):
     """
-    Training a SVM regressor
-    
+    Splits the player data into a training set of every other season and a test set of test_year
+
     Args:
         data: the cleaned player data
-        metrics_df: the overall metrics dataframe for all the metrics found so far in each model
-        years_to_test: a list of years to test against
+        test_year: the season left out for testing
+        award: the award whose vote shares are predicted
     Returns:
-        metrics_df: the overall metrics dataframe for all the models so far, including the metrics 
-                    for each year in years_to_test
-    
-    ****
-    Graphs a actual vs predicted scatter plot, saves the model locally, and displays the top MVP Shares
-    ****
+        X_tr, y_tr, X_te, y_te: unscaled features and award vote shares of the training and test sets
+        player_names: list of player names matching up with the rows of the test set
     """
-    for test_year in years_to_test:
-        train = data[data['year'] != test_year]
-        test = data[data['year'] == test_year]
+    train = data[data['year'] != test_year]
+    test = data[data['year'] == test_year]
 
-        player_names = list(test['player'])
+    player_names = list(test['player'])
 
-        X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_tr = train['mvp_share']
+    X_tr = train.drop(columns=non_feature_columns(award), errors='ignore')
+    y_tr = train[f'{award}_share']
 
-        X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_te = test['mvp_share']
+    X_te = test.drop(columns=non_feature_columns(award), errors='ignore')
+    y_te = test[f'{award}_share']
 
-        scaler = StandardScaler()
-        X_tr = scaler.fit_transform(X_tr)
-        X_te = scaler.transform(X_te)
-
-        param_grid = {'C': [0.001,0.01,0.1,0.5,1,2,5],
-                      'kernel': ['linear','rbf', 'poly'],
-                      'gamma': ['scale','auto'],
-                      'degree': [2,3,4],
-                      'epsilon': [0.1,0.5,1]
-                      }
-
-        svr_model = SVR()
-        grid = GridSearchCV(svr_model, param_grid)
-        grid.fit(X_tr, y_tr)
-        model = SVR(**grid.best_params_)
-        model.fit(X_tr, y_tr)
-        y_pred = model.predict(X_te)
+    return X_tr, y_tr, X_te, y_te, player_names
 
-        print(grid.best_params_)
-
-        plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-        plt.scatter(list(range(len(y_te))), y_te, label='actual')
-        plt.legend()
-        plt.title('Support Vector Regression')
-        plt.show()
-
-        metrics_df = get_metrics(y_te, y_pred,  metrics_df, 'SVR', test_year)
-        display_mvp_race_results(y_te, y_pred, 'SVR', player_names)
-
-        with open(model_path / f'svm_{test_year}.dat', 'wb') as f:
-           pickle.dump(model, f)
-    
-    return metrics_df
-
-
-def random_forest_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+def train_model(model_key: str, data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list,
+                show_plots: bool = True, save: bool = True, award: str = 'mvp'):
     """
-    Training a Random Forest regressor
-    
+    Grid searches, trains and evaluates a model of the registry, leaving out each test year in turn
+
     Args:
+        model_key: artifact name of the model in the registry, e.g. 'svm'
         data: the cleaned player data
         metrics_df: the overall metrics dataframe for all the metrics found so far in each model
         years_to_test: a list of years to test against
+        show_plots: whether to graph the actual vs predicted scatter plot
+        save: whether to save the model locally as 'models/{artifact}_{year}.dat' (see model_file),
+              along with its out-of-fold predictions (see oof_file)
+        award: the award whose vote shares are predicted, with data from data_treatment.player_data_save_path
     Returns:
-        metrics_df: the overall metrics dataframe for all the models so far, including the metrics 
-                    for each year in years_to_test
-    
+        metrics_df: the overall metrics dataframe for all the models so far, including the metrics
+                    and the search/fit/predict times for each year in years_to_test
+
     ****
     Graphs a actual vs predicted scatter plot, saves the model locally, and displays the top MVP Shares
     ****
     """
-    for test_year in years_to_test:
-        train = data[data['year'] != test_year]
-        test = data[data['year'] == test_year]
-
-        player_names = list(test['player'])
-
-        X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_tr = train['mvp_share']
+    from sklearn.model_selection import GridSearchCV
+    from sklearn.preprocessing import StandardScaler
 
-        X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_te = test['mvp_share']
+    spec = model_registry[model_key]
+    estimator = spec.estimator()
+    for test_year in years_to_test:
+        X_tr, y_tr, X_te, y_te, player_names = split_features(data, test_year, award)
+        features = list(X_tr.columns)
 
         scaler = StandardScaler()
         X_tr = scaler.fit_transform(X_tr)
         X_te = scaler.transform(X_te)
 
-        param_grid = {'n_estimators': [15,25,50,64,100,150,200],
-                      'max_features': [2,3,4,5],
-                      'bootstrap': [True, False],
-                      'oob_score': [True]
-                     }
-        
-        rfc = RandomForestRegressor()
-        grid = GridSearchCV(rfc, param_grid)
+        begin = time.perf_counter()
+        grid = GridSearchCV(estimator(), spec.param_grid)
         grid.fit(X_tr, y_tr)
-        model = RandomForestRegressor(**grid.best_params_)
+        search_seconds = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        model = estimator(**grid.best_params_)
         model.fit(X_tr, y_tr)
+        fit_seconds = time.perf_counter() - begin
+
+        begin = time.perf_counter()
         y_pred = model.predict(X_te)
+        predict_seconds = time.perf_counter() - begin
 
         print(grid.best_params_)
 
-        plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-        plt.scatter(list(range(len(y_te))), y_te, label='actual')
-        plt.legend()
-        plt.title('Random Forest')
-        plt.show()
+        if show_plots:
+            plot_predictions(y_te, y_pred, spec.title)
 
-        metrics_df = get_metrics(y_te, y_pred,  metrics_df, 'Random Forest', test_year)
-        display_mvp_race_results(y_te, y_pred, 'Random Forest', player_names)
+        timings = {'Search Time (s)': search_seconds,
+                   'Fit Time (s)': fit_seconds,
+                   'Predict Time (s)': predict_seconds}
+        metrics_df = get_metrics(y_te, y_pred, metrics_df, spec.name, test_year, timings)
+        display_mvp_race_results(y_te, y_pred, spec.name, player_names, award)
+
+        if save:
+            bundle = {'model': model,
+                      'scaler': scaler,
+                      'features': features,
+                      'params': grid.best_params_,
+                      'metadata': {'name': spec.name, 'year': test_year, 'award': award}}
+            save_model_bundle(bundle, model_file(spec.artifact, test_year, award))
+
+            # Cached for stacking.py, so a stacked ensemble can be fitted without retraining this model
+            oof_pred = out_of_fold_predictions(estimator, grid.best_params_, X_tr, y_tr,
+                                               data[data['year'] != test_year]['year'])
+            save_oof_predictions(data, test_year, y_tr, oof_pred, y_te, y_pred, spec.artifact, award)
 
-        with open(model_path / f'randomforest_{test_year}.dat', 'wb') as f:
-           pickle.dump(model, f)
-    
     return metrics_df
 
-def elastic_net_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+def oof_file(artifact: str, year: int, award: str = 'mvp'):
     """
-    Training a Elastic Net regressor
-    
-    Args:
-        data: the cleaned player data
-        metrics_df: the overall metrics dataframe for all the metrics found so far in each model
-        years_to_test: a list of years to test against
-    Returns:
-        metrics_df: the overall metrics dataframe for all the models so far, including the metrics 
-                    for each year in years_to_test
-    
-    ****
-    Graphs a actual vs predicted scatter plot, saves the model locally, and displays the top MVP Shares
-    ****
+    Path of the cached out-of-fold predictions of a saved model, e.g. 'models/oof/adaboost_2023.csv'
     """
-    for test_year in years_to_test:
-        train = data[data['year'] != test_year]
-        test = data[data['year'] == test_year]
-        
-        player_names = list(test['player'])
-
-        X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_tr = train['mvp_share']
-
-        X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_te = test['mvp_share']
-
-        scaler = StandardScaler()
-        X_tr = scaler.fit_transform(X_tr)
-        X_te = scaler.transform(X_te)
+    return model_path / 'oof' / f'{model_file(artifact, year, award).stem}.csv'
 
-        param_grid = {'alpha':[0.01,0.1,1.,5.,10.,50.,100.],
-                      'l1_ratio':[0.01,0.1,0.5,0.7,0.95,0.99,1]
-                      }
-
-        en_model = ElasticNet()
-        grid = GridSearchCV(en_model, param_grid)
-        grid.fit(X_tr, y_tr)
-        model = ElasticNet(**grid.best_params_)
-        model.fit(X_tr, y_tr)
-        y_pred = model.predict(X_te)
+def out_of_fold_predictions(estimator, params: dict, X_tr: np.array, y_tr: pd.Series, seasons: pd.Series):
+    """
+    Predicts every training row with a model fitted on the other seasons, keeping whole seasons together
+    so that the predictions of a season never come from a model that saw that season
 
-        print(grid.best_params_)
+    Args:
+        estimator: the sklearn estimator class
+        params: the best parameters of the grid search
+        X_tr: scaled training features
+        y_tr: training MVP shares
+        seasons: season of each training row
+    Returns:
+        oof_pred: out-of-fold predicted MVP shares of the training rows
+    """
+    from sklearn.model_selection import GroupKFold, cross_val_predict
 
-        plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-        plt.scatter(list(range(len(y_te))), y_te, label='actual')
-        plt.legend()
-        plt.title('ElasticNet')
-        plt.show()
+    n_splits = min(5, seasons.nunique())
+    return cross_val_predict(estimator(**params), X_tr, y_tr, groups=seasons, cv=GroupKFold(n_splits))
 
-        metrics_df = get_metrics(y_te, y_pred,  metrics_df, 'ElasticNet', test_year)
-        display_mvp_race_results(y_te, y_pred, 'ElasticNet', player_names)
-        with open(model_path / f'elasticnet_{test_year}.dat', 'wb') as f:
-           pickle.dump(model, f)
-    
-    return metrics_df
+def save_oof_predictions(data: pd.DataFrame, test_year: int, y_tr: pd.Series, oof_pred: np.array,
+                         y_te: pd.Series, y_pred: np.array, artifact: str, award: str = 'mvp'):
+    """
+    Saves the out-of-fold predictions of the training seasons and the predictions of the test season
+    in 'models/oof/', keyed by the row of each player in the player data
 
-def adaboost_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    Args:
+        data: the cleaned player data
+        test_year: the season left out for testing
+        y_tr: training MVP shares
+        oof_pred: out-of-fold predictions of the training rows
+        y_te: actual MVP shares of the test season
+        y_pred: predictions of the test season
+        artifact: prefix of the saved model
+        award: the award whose vote shares are predicted
     """
-    Training a AdaBoost regressor
-    
+    # The player and season of each row are saved along with it, so stacking.py can check that the cached
+    # predictions of every base model refer to the same rows of the player data
+    id_columns = [column for column in ['player_id', 'player', 'year'] if column in data.columns]
+    dfs = []
+    for rows, actual, prediction, fold in [(data[data['year'] != test_year], y_tr, oof_pred, 'oof'),
+                                           (data[data['year'] == test_year], y_te, y_pred, 'test')]:
+        df = rows[id_columns].copy()
+        df.insert(0, 'row', rows.index)
+        df['actual'] = actual.to_numpy()
+        df['prediction'] = prediction
+        df['fold'] = fold
+        dfs.append(df)
+    oof_df = pd.concat(dfs)
+
+    save_file = oof_file(artifact, test_year, award)
+    if not os.path.exists(save_file.parent):
+        os.makedirs(save_file.parent)
+    oof_df.to_csv(save_file, index=False)
+
+def compare_models(data: pd.DataFrame, model_keys: list, years_to_test: list, award: str = 'mvp'):
+    """
+    Trains the given models side by side without plotting or saving them, to compare their accuracy
+    and how long each takes to search, fit and predict
+
     Args:
         data: the cleaned player data
-        metrics_df: the overall metrics dataframe for all the metrics found so far in each model
+        model_keys: artifact names of the models in the registry, e.g. ['gradboost', 'histgradboost']
         years_to_test: a list of years to test against
+        award: the award whose vote shares are predicted
     Returns:
-        metrics_df: the overall metrics dataframe for all the models so far, including the metrics 
-                    for each year in years_to_test
-
-    ****
-    Graphs a actual vs predicted scatter plot, saves the model locally, and displays the top MVP Shares
-    ****
+        metrics_df: the metrics of every model and year, sorted by year and RMSE
     """
-    for test_year in years_to_test:
-        train = data[data['year'] != test_year]
-        test = data[data['year'] == test_year]
+    metrics_df = pd.DataFrame()
+    for model_key in model_keys:
+        metrics_df = train_model(model_key, data, metrics_df, years_to_test, show_plots=False, save=False,
+                                 award=award)
+    return metrics_df.sort_values(['Year', 'RMSE']).reset_index(drop=True)
 
-        player_names = list(test['player'])
+def svm_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a SVM regressor, see train_model
+    """
+    return train_model('svm', data, metrics_df, years_to_test)
 
-        X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_tr = train['mvp_share']
+def random_forest_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a Random Forest regressor, see train_model
+    """
+    return train_model('randomforest', data, metrics_df, years_to_test)
 
-        X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_te = test['mvp_share']
+def elastic_net_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a Elastic Net regressor, see train_model
+    """
+    return train_model('elasticnet', data, metrics_df, years_to_test)
 
-        scaler = StandardScaler()
-        X_tr = scaler.fit_transform(X_tr)
-        X_te = scaler.transform(X_te)
+def adaboost_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a AdaBoost regressor, see train_model
+    """
+    return train_model('adaboost', data, metrics_df, years_to_test)
 
-        param_grid = {'n_estimators': [5,10,20,30,40,50,100],
-                       'learning_rate': [0.01,0.05,0.1,0.2,0.5]}
+def gradientboost_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a GradientBoost regressor, see train_model
+    """
+    return train_model('gradboost', data, metrics_df, years_to_test)
 
-        ada_model = AdaBoostRegressor()
-        grid = GridSearchCV(ada_model, param_grid)
-        grid.fit(X_tr, y_tr)
-        model = AdaBoostRegressor(**grid.best_params_)
-        model.fit(X_tr, y_tr)
-        y_pred = model.predict(X_te)
+def hist_gradientboost_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+    """
+    Training a HistGradientBoost regressor, see train_model
+    """
+    return train_model('histgradboost', data, metrics_df, years_to_test)
 
-        print(grid.best_params_)
+def save_model_bundle(bundle: dict, path: Path):
+    """
+    Saves a model bundle locally
 
-        plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-        plt.scatter(list(range(len(y_te))), y_te, label='actual')
-        plt.legend()
-        plt.title('AdaBoost')
-        plt.show()
+    Args:
+        bundle: the model bundle, see load_model_bundle
+        path: path of the saved model, e.g. 'models/adaboost_2023.dat'
+    """
+    if not os.path.exists(Path(path).parent):
+        os.makedirs(Path(path).parent)
+    with open(path, 'wb') as f:
+        pickle.dump(bundle, f)
 
-        metrics_df = get_metrics(y_te, y_pred,  metrics_df, 'AdaBoost', test_year)
-        display_mvp_race_results(y_te, y_pred, 'AdaBoost', player_names)
+def load_model_bundle(path: Path):
+    """
+    Loads a saved model bundle. Models saved before bundles existed only hold the fitted estimator,
+    so they are wrapped in a bundle without a scaler, and the scaler is refitted when they are used.
 
-        with open(model_path / f'adaboost_{test_year}.dat', 'wb') as f:
-           pickle.dump(model, f)
-    
-    return metrics_df
+    Args:
+        path: path of the saved model, e.g. 'models/adaboost_2023.dat'
+    Returns:
+        bundle: dictionary with the fitted 'model', the fitted 'scaler', the 'features' the model
+                was trained on, the best grid search 'params' and free-form 'metadata'
+    """
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+    if not isinstance(bundle, dict):
+        bundle = {'model': bundle, 'scaler': None, 'features': None, 'params': None, 'metadata': {}}
+    return bundle
 
-def gradientboost_model(data: pd.DataFrame, metrics_df: pd.DataFrame, years_to_test: list):
+def prepare_test_features(bundle: dict, data: pd.DataFrame, year: int):
     """
-    Training a GradientBoost regressor
-    
+    Scales the features of a season the same way the bundled model was trained
+
     Args:
+        bundle: the model bundle, see load_model_bundle
         data: the cleaned player data
-        metrics_df: the overall metrics dataframe for all the metrics found so far in each model
-        years_to_test: a list of years to test against
+        year: the season to test
     Returns:
-        metrics_df: the overall metrics dataframe for all the models so far, including the metrics 
-                    for each year in years_to_test
-    ****
-    Graphs a actual vs predicted scatter plot, saves the model locally, and displays the top MVP Shares
-    ****
+        X_te: scaled features of the season
+        y_te: actual award vote shares of the season
+        player_names: list of player names matching up with the rows of X_te
     """
-    for test_year in years_to_test:
-        train = data[data['year'] != test_year]
-        test = data[data['year'] == test_year]
-
-        player_names = list(test['player'])
+    award = bundle['metadata'].get('award', 'mvp')
+    X_tr, _, X_te, y_te, player_names = split_features(data, year, award)
+    if bundle['features'] is not None:
+        X_te = X_te[bundle['features']]
 
-        X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_tr = train['mvp_share']
-
-        X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-        y_te = test['mvp_share']
+    scaler = bundle['scaler']
+    if scaler is None:
+        from sklearn.preprocessing import StandardScaler
 
         scaler = StandardScaler()
-        X_tr = scaler.fit_transform(X_tr)
-        X_te = scaler.transform(X_te)
-
-        param_grid = {'n_estimators': [10,20,30,40,50],
-                      'learning_rate': [0.01,0.05,0.1,0.2,0.5],
-                      'max_depth': [3,4,5]}
-
-        grad_model = GradientBoostingRegressor()
-        grid = GridSearchCV(grad_model, param_grid)
-        grid.fit(X_tr, y_tr)
-        model = GradientBoostingRegressor(**grid.best_params_)
-        model.fit(X_tr, y_tr)
-        y_pred = model.predict(X_te)
-
-        print(grid.best_params_)
-
-        plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-        plt.scatter(list(range(len(y_te))), y_te, label='actual')
-        plt.legend()
-        plt.title('GradientBoost')
-        plt.show()
+        scaler.fit(X_tr)
+    return scaler.transform(X_te), y_te, player_names
 
-        metrics_df = get_metrics(y_te, y_pred,  metrics_df, 'GradientBoost', test_year)
-        display_mvp_race_results(y_te, y_pred, 'GradientBoost', player_names)
-        with open(model_path / f'gradboost_{test_year}.dat', 'wb') as f:
-           pickle.dump(model, f)
-    
-    return metrics_df
-
-def load_model(data: pd.DataFrame, saved_model_paths: list, test_years: list):
+def load_model(data: pd.DataFrame, saved_model_paths: list, test_years: list, show_plots: bool = True):
     """
     Loads selected saved models and displays results
 
@@ -384,6 +393,7 @@ def load_model(data: pd.DataFrame, saved_model_paths: list, test_years: list):
         data: the cleaned player data
         saved_model_paths: a list of model paths that you would like to be displayed from 'models/*.dat'
         test_years: the years to be tested with each model
+        show_plots: whether to graph the actual vs predicted scatter plot for each model
     Returns:
         metrics_df: A complete metrics df representing the selected models.
     ****
@@ -398,31 +408,36 @@ def load_model(data: pd.DataFrame, saved_model_paths: list, test_years: list):
         
         model_name = str(path).split('_')[0]
         print(f'Loaded {path}')
-        loaded_model = pickle.load(open(path, 'rb'))
+        bundle = load_model_bundle(path)
         
         for year in test_years:
-            train = data[data['year'] != year]
-            test = data[data['year'] == year]
-
-            player_names = list(test['player'])
-
-            X_tr = train.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
+            X_te, y_te, player_names = prepare_test_features(bundle, data, year)
+            y_pred = bundle['model'].predict(X_te)
 
-            X_te = test.drop(columns=['mvp_share', 'mvp_rank', 'first_place_votes', 'year', 'player'])
-            y_te = test['mvp_share']
-
-            scaler = StandardScaler()
-            X_tr = scaler.fit_transform(X_tr)
-            X_te = scaler.transform(X_te)
-
-            y_pred = loaded_model.predict(X_te)
-
-            plt.scatter(list(range(len(y_pred))), y_pred, label='predicted')
-            plt.scatter(list(range(len(y_te))), y_te, label='actual')
-            plt.legend()
-            plt.title(model_name)
-            plt.show()
+            if show_plots:
+                plot_predictions(y_te, y_pred, model_name)
 
             metrics_df = get_metrics(y_te, y_pred, metrics_df, model_name, year)
-            display_mvp_race_results(y_te, y_pred, model_name, player_names)
+            display_mvp_race_results(y_te, y_pred, model_name, player_names, bundle['metadata'].get('award', 'mvp'))
     return metrics_df
+
+def score_model(data: pd.DataFrame, saved_model_path: Path, year: int, top_n: int = 3):
+    """
+    Scores a single season with a saved model, without plotting or refitting the model
+
+    Args:
+        data: the cleaned player data
+        saved_model_path: path of the saved model in 'models/*.dat'
+        year: the season to score
+        top_n: number of MVP candidates to return
+    Returns:
+        scores_df: the top_n players of the season sorted by predicted award vote share
+    """
+    bundle = load_model_bundle(saved_model_path)
+    X_te, _, player_names = prepare_test_features(bundle, data, year)
+    y_pred = bundle['model'].predict(X_te)
+
+    share_column = f"predicted_{bundle['metadata'].get('award', 'mvp')}_share"
+    scores_df = pd.DataFrame({'player': player_names, share_column: y_pred})
+    scores_df = scores_df.sort_values(share_column, ascending=False)
+    return scores_df.head(top_n)
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Callable
+
+# The estimator classes are imported inside the factories below, so only the estimators
+# that are actually trained get imported
+
+
+@dataclass
+class ModelSpec:
+    """
+    Entry of the model registry
+
+    Attributes:
+        name: name of the model used in the metrics and MVP race results
+        title: title of the actual vs predicted scatter plot
+        artifact: prefix of the saved model, which is stored as 'models/{artifact}_{year}.dat'
+        estimator: factory returning the sklearn estimator class
+        param_grid: search space of the grid search
+    """
+    name: str
+    title: str
+    artifact: str
+    estimator: Callable[[], type]
+    param_grid: dict
+
+
+def svr():
+    from sklearn.svm import SVR
+    return SVR
+
+def random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor
+
+def elastic_net():
+    from sklearn.linear_model import ElasticNet
+    return ElasticNet
+
+def adaboost():
+    from sklearn.ensemble import AdaBoostRegressor
+    return AdaBoostRegressor
+
+def gradient_boost():
+    from sklearn.ensemble import GradientBoostingRegressor
+    return GradientBoostingRegressor
+
+def hist_gradient_boost():
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    return HistGradientBoostingRegressor
+
+
+model_registry = {}
+
+def register_model(spec: ModelSpec):
+    """
+    Adds a model to the registry, keyed by its artifact name
+
+    Args:
+        spec: the model entry to add
+    """
+    model_registry[spec.artifact] = spec
+
+
+register_model(ModelSpec(name='SVR',
+                         title='Support Vector Regression',
+                         artifact='svm',
+                         estimator=svr,
+                         param_grid={'C': [0.001,0.01,0.1,0.5,1,2,5],
+                                     'kernel': ['linear','rbf', 'poly'],
+                                     'gamma': ['scale','auto'],
+                                     'degree': [2,3,4],
+                                     'epsilon': [0.1,0.5,1]
+                                     }))
+
+register_model(ModelSpec(name='Random Forest',
+                         title='Random Forest',
+                         artifact='randomforest',
+                         estimator=random_forest,
+                         param_grid={'n_estimators': [15,25,50,64,100,150,200],
+                                     'max_features': [2,3,4,5],
+                                     'bootstrap': [True, False],
+                                     'oob_score': [True]
+                                     }))
+
+register_model(ModelSpec(name='ElasticNet',
+                         title='ElasticNet',
+                         artifact='elasticnet',
+                         estimator=elastic_net,
+                         param_grid={'alpha':[0.01,0.1,1.,5.,10.,50.,100.],
+                                     'l1_ratio':[0.01,0.1,0.5,0.7,0.95,0.99,1]
+                                     }))
+
+register_model(ModelSpec(name='AdaBoost',
+                         title='AdaBoost',
+                         artifact='adaboost',
+                         estimator=adaboost,
+                         param_grid={'n_estimators': [5,10,20,30,40,50,100],
+                                     'learning_rate': [0.01,0.05,0.1,0.2,0.5]
+                                     }))
+
+register_model(ModelSpec(name='GradientBoost',
+                         title='GradientBoost',
+                         artifact='gradboost',
+                         estimator=gradient_boost,
+                         param_grid={'n_estimators': [10,20,30,40,50],
+                                     'learning_rate': [0.01,0.05,0.1,0.2,0.5],
+                                     'max_depth': [3,4,5]
+                                     }))
+
+# Histogram-based gradient boosting bins the features once before fitting, so it is a faster
+# alternative to GradientBoost and AdaBoost. Compare them with `python cli.py compare`
+register_model(ModelSpec(name='HistGradientBoost',
+                         title='HistGradientBoost',
+                         artifact='histgradboost',
+                         estimator=hist_gradient_boost,
+                         param_grid={'max_iter': [50,100,200],
+                                     'learning_rate': [0.05,0.1,0.2],
+                                     'max_leaf_nodes': [7,15,31],
+                                     'min_samples_leaf': [5,10,20]
+                                     }))
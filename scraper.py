@@ -1,28 +1,74 @@
-import requests
 import platform
 import os
+import re
 import time
 from pathlib import Path
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Comment
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+
+from crawl_journal import load_journal, crawl_page, record, is_done, adopt_downloaded_page, has_table, checksum, write_page
+from crawl_journal import DONE, FAILED, PENDING, max_attempts, backoff_base
+
+# requests and selenium are only needed to download pages, so they are imported inside
+# the download functions and the parse functions do not pay for them
 
 # Basketball Reference crawl delay is 3 seconds
 crawl_delay = 3
+# Default seasons, identified by the year the season ends. See backfill.py for other season ranges
 years = range(2000, 2024)
 mvp_save_dir = Path('data') / 'mvp_votings'
 pstats_save_dir = Path('data') / 'player_stats'
 team_record_save_dir = Path('data') / 'team_records'
 advanced_stats_dir = Path('data') / 'advanced_stats'
 
+# Player pages are linked as /players/{first letter}/{slug}.html, e.g. /players/j/jamesle01.html
+player_link_pattern = re.compile(r'^/players/[a-z]/(?P<slug>[a-z0-9]+)\.html$')
 
-def download_mvp_votings():
+
+def parse_player_slugs(table):
+    """
+    Captures the Basketball Reference player slug from the player link of each row of a table
+
+    Args:
+        table: BeautifulSoup table whose extra headers have already been removed
+
+    Returns:
+        slugs: one slug per row that pd.read_html parses from the table, None for rows without a player link
+    """
+    slugs = []
+    for row in table.find_all('tr'):
+        if row.find_parent('thead') is not None:
+            continue
+        slug = None
+        for link in row.find_all('a', href=True):
+            match = player_link_pattern.match(link['href'])
+            if match:
+                slug = match.group('slug')
+                break
+        slugs.append(slug)
+    return slugs
+
+def add_player_slugs(df: pd.DataFrame, table):
+    """
+    Adds the 'player_slug' column to a dataframe parsed from a table
+
+    Args:
+        df: the dataframe parsed from the table with pd.read_html
+        table: the BeautifulSoup table the dataframe was parsed from
+    """
+    slugs = parse_player_slugs(table)
+    if len(slugs) != len(df):
+        raise ValueError(f'Found {len(slugs)} player rows but parsed {len(df)} rows')
+    df['player_slug'] = slugs
+
+
+def download_mvp_votings(seasons: list = None):
     """
     Goes through range of years on the MVP Votings page on Basketball Reference
     and downloads the HTML data locally
 
-    Args: None
+    Args:
+        seasons: the seasons to download, defaults to years
 
     Action: Downloads data locally
     """
@@ -33,83 +79,187 @@ def download_mvp_votings():
     # Taking in range of years
     # base url: https://www.basketball-reference.com/awards/awards_{year}.html
     # where {year} is the year the NBA MVP was awarded
-    for year in years:
+    journal = load_journal()
+    for year in seasons or years:
         print(f'Downloading MVP votings from {year}')
         url = f'https://www.basketball-reference.com/awards/awards_{year}.html'
-        r = requests.get(url=url)
-        web_content = r.content.decode('utf-8')
         save_file = raw_mvp_save_dir / f'awards_{year}.html'
-        with open(save_file, 'w', encoding='utf-8') as f:
-            f.write(web_content)
-        time.sleep(crawl_delay)
+        # Seasons before 1956 have no MVP, so any award voting table makes a valid awards page
+        if crawl_page(journal, 'awards', year, url, save_file, has_award_voting_table):
+            time.sleep(crawl_delay)
 
-def parse_mvp_votings():
+def award_votings_file(award: str):
     """
-    Parses the MVP tables from the locally downloaded HTML data.
+    Name of the processed csv file of an award, e.g. 'roy.csv'. The MVP votings keep their original 'mvps.csv'
+    """
+    return 'mvps.csv' if award == 'mvp' else f'{award}.csv'
+
+def find_award_voting_tables(soup: BeautifulSoup):
+    """
+    Finds every award voting table of an awards page. Only the first table of the page is plain HTML,
+    Basketball Reference ships the other ones inside HTML comments, so those are parsed as well.
 
-    Args: None
+    Args:
+        soup: BeautifulSoup of an awards page
 
-    Actions: Combines MVP table data and stores it
+    Returns:
+        voting_tables: dictionary of table id (the award, e.g. 'mvp', 'roy', 'dpoy') to table
     """
-    dfs = []
-    for year in years:
-        print(f'Parsing MVP votings from {year}')
+    tables = soup.find_all('table')
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        if '<table' in comment:
+            tables.extend(BeautifulSoup(comment, 'html.parser').find_all('table'))
+
+    # Voting tables are the ones with a vote 'Share' column, which excludes the All-NBA style tables
+    voting_tables = {}
+    for table in tables:
+        header = table.find('thead')
+        if table.get('id') and header and any(th.get_text(strip=True) == 'Share' for th in header.find_all('th')):
+            voting_tables[table['id']] = table
+    return voting_tables
+
+def has_award_voting_table(content: str):
+    """
+    Checks that an awards page contains at least one award voting table, see find_award_voting_tables
+    """
+    return len(find_award_voting_tables(BeautifulSoup(content, 'html.parser'))) > 0
+
+def parse_award_votings(seasons: list = None, processed_dir: Path = None):
+    """
+    Parses every award voting table (MVP, ROY, DPOY, Sixth Man, MIP...) from the locally downloaded
+    awards pages, in a single pass over each page.
+
+    Args:
+        seasons: the seasons to parse, defaults to years
+        processed_dir: directory of the processed csv file, defaults to the 'processed' data directory
+
+    Actions: Combines the table data of each award and stores it as one csv file per award
+
+    Returns:
+        awards: the awards that were found
+    """
+    award_dfs = {}
+    for year in seasons or years:
+        print(f'Parsing award votings from {year}')
         # Creating BeautifulSoup for data
         content = open(mvp_save_dir / 'raw' / f'awards_{year}.html', 'r', encoding='utf-8')
         soup = BeautifulSoup(content, 'html.parser')
-        table = soup.find('table', attrs={'id': 'mvp'})
-
-        # Removing overheader
-        overheader = table.find('tr', attrs={'class':'over_header'})
-        overheader.extract()
-        
-        df = pd.read_html(table.prettify())[0]
-        df['year']= year
-        dfs.append(df)
         content.close()
+
+        for award, table in find_award_voting_tables(soup).items():
+            # Removing overheader
+            overheader = table.find('tr', attrs={'class':'over_header'})
+            if overheader is not None:
+                overheader.extract()
+
+            df = pd.read_html(table.prettify())[0]
+            add_player_slugs(df, table)
+            df['year']= year
+            award_dfs.setdefault(award, []).append(df)
     
-    mvps = pd.concat(dfs)
-    processed_mvp_save_dir = mvp_save_dir / 'processed'
+    processed_mvp_save_dir = processed_dir or mvp_save_dir / 'processed'
     if not os.path.exists(processed_mvp_save_dir):
         os.makedirs(processed_mvp_save_dir)
-    mvps.to_csv(processed_mvp_save_dir / 'mvps.csv', index=False)
+    for award, dfs in award_dfs.items():
+        pd.concat(dfs).to_csv(processed_mvp_save_dir / award_votings_file(award), index=False)
+    return list(award_dfs)
+
+def parse_mvp_votings(seasons: list = None, processed_dir: Path = None):
+    """
+    Parses the MVP tables from the locally downloaded HTML data.
+    The other award voting tables are parsed in the same pass, see parse_award_votings.
+
+    Args:
+        seasons: the seasons to parse, defaults to years
+        processed_dir: directory of the processed csv file, defaults to the 'processed' data directory
+
+    Actions: Combines MVP table data and stores it
+    """
+    parse_award_votings(seasons, processed_dir)
     
-def download_player_stats():
+def download_player_stats(seasons: list = None):
     """
     Downloads individual player stats
 
-    Args: None
+    Args:
+        seasons: the seasons to download, defaults to years
 
     Actions: Downloads HTML data of individual player stats locally
     """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import WebDriverException
+
+    raw_pstats_save_dir = pstats_save_dir / 'raw'
+    if not os.path.exists(raw_pstats_save_dir):
+        os.makedirs(raw_pstats_save_dir)
+
+    # Only starts a selenium session if some season was not downloaded yet
+    journal = load_journal()
+    pending = []
+    for year in seasons or years:
+        save_file = raw_pstats_save_dir / f'player_stats_{year}.html'
+        if not (is_done(journal, 'per_game', year, save_file) or
+                adopt_downloaded_page(journal, 'per_game', year, save_file, 'per_game_stats')):
+            pending.append(year)
+    if not pending:
+        print('Skipping player stats, already downloaded')
+        return
+
     # Starting selenium driver with Safari (only on OSX)
     # Utilize Chrome for all others...
     if platform.system() == 'Windows':
         driver = webdriver.Chrome()
     else:
         driver = webdriver.Safari()
-    raw_pstats_save_dir = pstats_save_dir / 'raw'
-    if not os.path.exists(raw_pstats_save_dir):
-        os.makedirs(raw_pstats_save_dir)
-
-    for year in years:
-        print(f'Downloading player stats from {year}')
-        url = f'https://www.basketball-reference.com/leagues/NBA_{year}_per_game.html'
-        driver.get(url)
-        driver.execute_script("window.scrollTo(1, document.body.scrollHeight)")
-        time.sleep(3)
 
-        table = driver.find_element(By.TAG_NAME, 'table')
-        html_table_content = table.get_attribute('outerHTML')
-        save_file = raw_pstats_save_dir / f'player_stats_{year}.html'
-        with open(save_file, 'w', encoding='utf-8') as f:
-            f.write(html_table_content)
-
-def parse_player_stats():
+    # The browser session is closed even when a download is interrupted
+    try:
+        for year in pending:
+            print(f'Downloading player stats from {year}')
+            url = f'https://www.basketball-reference.com/leagues/NBA_{year}_per_game.html'
+            save_file = raw_pstats_save_dir / f'player_stats_{year}.html'
+            record(journal, 'per_game', year, PENDING, save_file)
+
+            # Retries with exponential backoff when the page fails to load or is missing the table,
+            # e.g. when it is a throttling page
+            html_table_content, error = None, None
+            for attempt in range(max_attempts):
+                if attempt > 0:
+                    print(f'Retrying {url} in {backoff_base * 2 ** (attempt - 1)}s ({error})')
+                    time.sleep(backoff_base * 2 ** (attempt - 1))
+                try:
+                    driver.get(url)
+                    driver.execute_script("window.scrollTo(1, document.body.scrollHeight)")
+                    time.sleep(3)
+
+                    table = driver.find_element(By.TAG_NAME, 'table')
+                    html_table_content = table.get_attribute('outerHTML')
+                except WebDriverException as e:
+                    html_table_content, error = None, e.msg
+                    continue
+                if has_table(html_table_content, 'per_game_stats'):
+                    break
+                html_table_content, error = None, 'table per_game_stats not found'
+
+            if html_table_content is None:
+                print(f'Failed to download player stats from {year}: {error}')
+                record(journal, 'per_game', year, FAILED, save_file, attempts=max_attempts, error=error)
+                continue
+
+            write_page(save_file, html_table_content)
+            record(journal, 'per_game', year, DONE, save_file, content_checksum=checksum(html_table_content),
+                   attempts=attempt + 1)
+    finally:
+        driver.quit()
+
+def parse_player_stats(seasons: list = None, processed_dir: Path = None):
     """
     Parses player stats from locally downloaded html files
 
-    Args: None
+    Args:
+        seasons: the seasons to parse, defaults to years
+        processed_dir: directory of the processed csv file, defaults to the 'processed' data directory
 
     Actions: Combines year to year data from player stats into a dataframe and saves it locally
 
@@ -117,7 +267,7 @@ def parse_player_stats():
     ## Players that are traded will have multiple rows for their stats representing each team they played on.
     """
     dfs = []
-    for year in years:
+    for year in seasons or years:
         print(f'Parsing player stats from {year}')
         content = open(pstats_save_dir / 'raw' / f'player_stats_{year}.html', 'r', encoding='utf-8')
         table = BeautifulSoup(content, 'html.parser')
@@ -127,78 +277,76 @@ def parse_player_stats():
         for extra in extra_headers:
             extra.extract()
         df = pd.read_html(table.prettify())[0]
+        add_player_slugs(df, table)
         df['year'] = year
         dfs.append(df)
         content.close()
     
     player_stats = pd.concat(dfs)
-    processed_pstats_save_dir = pstats_save_dir / 'processed'
+    processed_pstats_save_dir = processed_dir or pstats_save_dir / 'processed'
     if not os.path.exists(processed_pstats_save_dir):
         os.makedirs(processed_pstats_save_dir)
     player_stats.to_csv(processed_pstats_save_dir/ 'player_stats.csv', index=False)
 
 
-def download_team_records():
+def download_team_records(seasons: list = None):
     """
     Downloads team records locally
 
-    Args: None
+    Args:
+        seasons: the seasons to download, defaults to years
 
     Actions: Downloads year to year team record HTML data locally
     """
     raw_team_record_save_dir = team_record_save_dir / 'raw'
     if not os.path.exists(raw_team_record_save_dir):
         os.makedirs(raw_team_record_save_dir)
-    for year in years:
+    journal = load_journal()
+    for year in seasons or years:
         print(f'Downloading team records from {year}')
         url = f'https://www.basketball-reference.com/leagues/NBA_{year}_standings.html'
-        r = requests.get(url)
-        web_content = r.content.decode('utf-8')
         save_file = raw_team_record_save_dir / f'team_records_{year}.html'
-        with open(save_file, 'w', encoding='utf-8') as f:
-            f.write(web_content)
-        time.sleep(crawl_delay)
+        if crawl_page(journal, 'standings', year, url, save_file, 'divs_standings_'):
+            time.sleep(crawl_delay)
 
-def parse_team_records():
+def parse_team_records(seasons: list = None, processed_dir: Path = None):
     """
     Parses team records from locally downloaded html files
 
-    Args: None
+    Args:
+        seasons: the seasons to parse, defaults to years
+        processed_dir: directory of the processed csv file, defaults to the 'processed' data directory
 
     Actions: Combines year to year team record data into a single dataframe and saves it locally
     """
     dfs = []
-    for year in years:
+    for year in seasons or years:
         print(f'Parsing team records from {year}')
         content = open(team_record_save_dir / 'raw' / f'team_records_{year}.html', 'r', encoding='utf-8')
         soup = BeautifulSoup(content, 'html.parser')
         for extra in soup.find_all('tr', attrs={'class': 'thead'}):
             extra.extract()
 
-        eastern_conf_standings_table = soup.find('table', attrs={'id': 'divs_standings_E'})
-        eastern_conf_df = pd.read_html(eastern_conf_standings_table.prettify())[0]
-        eastern_conf_df['year'] = year
-        eastern_conf_df.rename(columns={'Eastern Conference': 'Tm'}, inplace=True)
-        
-        western_conf_standings_table = soup.find('table', attrs={'id': 'divs_standings_W'})
-        western_conf_df = pd.read_html(western_conf_standings_table.prettify())[0]
-        western_conf_df['year'] = year
-        western_conf_df.rename(columns={'Western Conference': 'Tm'}, inplace=True)
-
-        dfs.append(eastern_conf_df)
-        dfs.append(western_conf_df)
+        # One table per conference (divs_standings_E and divs_standings_W). Before the conferences,
+        # the tables are the divisions, e.g. 'Eastern Division' and 'Central Division' in 1950
+        for standings_table in soup.find_all('table', attrs={'id': re.compile(r'^divs_standings_')}):
+            standings_df = pd.read_html(standings_table.prettify())[0]
+            standings_df['year'] = year
+            standings_df.rename(columns={standings_df.columns[0]: 'Tm'}, inplace=True)
+            dfs.append(standings_df)
     
     team_records = pd.concat(dfs)
-    processed_team_record_save_dir = team_record_save_dir / 'processed'
+    processed_team_record_save_dir = processed_dir or team_record_save_dir / 'processed'
     if not os.path.exists(processed_team_record_save_dir):
         os.makedirs(processed_team_record_save_dir)
     team_records.to_csv(processed_team_record_save_dir / 'team_records.csv', index=False)
 
-def download_advanced_stats():
+def download_advanced_stats(seasons: list = None):
     """
     Downloads advanced stats, such as player efficiency rating (PER) and winshare (WS)
 
-    Args: None
+    Args:
+        seasons: the seasons to download, defaults to years
 
     Actions: Downloads advanced stats to local
     """
@@ -206,27 +354,26 @@ def download_advanced_stats():
     if not os.path.exists(advanced_raw_dir):
         os.makedirs(advanced_raw_dir)
 
-    for year in years:
+    journal = load_journal()
+    for year in seasons or years:
         print(f'Downloading advanced stats from {year}')
         url = f'https://www.basketball-reference.com/leagues/NBA_{year}_advanced.html'
-
-        r = requests.get(url)
-        web_content = r.content.decode('utf-8')
         save_file = advanced_raw_dir / f'adv_stats_{year}.html'
-        with open(save_file, 'w', encoding='utf-8') as f:
-            f.write(web_content)
-        time.sleep(crawl_delay)
+        if crawl_page(journal, 'advanced', year, url, save_file, 'advanced'):
+            time.sleep(crawl_delay)
 
-def parse_advanced_stats():
+def parse_advanced_stats(seasons: list = None, processed_dir: Path = None):
     """
     Parses advanced stats from raw html data
 
-    Args: None
+    Args:
+        seasons: the seasons to parse, defaults to years
+        processed_dir: directory of the processed csv file, defaults to the 'processed' data directory
 
     Action: Scrapes table data from raw html data and stores it locally
     """
     dfs = []
-    for year in years:
+    for year in seasons or years:
         print(f'Parsing advanced stats from {year}')
         file = advanced_stats_dir / 'raw' / f'adv_stats_{year}.html'
         content = open(file, 'r', encoding='utf-8')
@@ -237,11 +384,13 @@ def parse_advanced_stats():
         for t in thead:
             t.extract()
         df = pd.read_html(table.prettify())[0]
-        df.drop(columns=['Unnamed: 24', 'Unnamed: 19'], inplace=True)
+        add_player_slugs(df, table)
+        # Drops the blank spacer columns, which move around in older seasons that track fewer stats
+        df.drop(columns=[column for column in df.columns if str(column).startswith('Unnamed')], inplace=True)
         df['year'] = year
         dfs.append(df)
     
-    processed_save_file = advanced_stats_dir / 'processed'
+    processed_save_file = processed_dir or advanced_stats_dir / 'processed'
     if not os.path.exists(processed_save_file):
         os.makedirs(processed_save_file)
     adv_stats = pd.concat(dfs)
@@ -0,0 +1,194 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from model import model_file, load_model_bundle, split_features
+from registry import model_registry
+
+
+def fit_member(estimator, params: dict, X_tr: np.array, y_tr: np.array, seed: int):
+    """
+    Fits one member of a bootstrap ensemble on a resample of the training set
+
+    Args:
+        estimator: the sklearn estimator class
+        params: parameters of the estimator
+        X_tr: scaled training features
+        y_tr: training MVP shares
+        seed: seed of the resample, and of the estimator itself when it is randomized
+    Returns:
+        model: the fitted member
+        residuals: residuals of the member on the out-of-bag training rows
+    """
+    rng = np.random.default_rng(seed)
+    sample = rng.integers(0, len(X_tr), len(X_tr))
+    out_of_bag = np.ones(len(X_tr), dtype=bool)
+    out_of_bag[sample] = False
+
+    model = estimator(**params)
+    if 'random_state' in model.get_params():
+        model.set_params(random_state=seed)
+    model.fit(X_tr[sample], y_tr[sample])
+    residuals = y_tr[out_of_bag] - model.predict(X_tr[out_of_bag])
+    return model, residuals
+
+def fit_bootstrap_ensemble(model_key: str, data: pd.DataFrame, year: int, n_members: int = 50,
+                           params: dict = None, n_jobs: int = -1, seed: int = 0, award: str = 'mvp'):
+    """
+    Trains a bootstrap ensemble of a registered model in parallel, leaving out the given season
+
+    Args:
+        model_key: artifact name of the model in the registry, e.g. 'adaboost'
+        data: the cleaned player data
+        year: the season left out for testing
+        n_members: number of bootstrap members
+        params: parameters of the estimator. Defaults to the best parameters of the saved model
+                'models/{artifact}_{year}.dat' if it exists, otherwise to the estimator defaults
+        n_jobs: number of parallel workers, -1 uses every core
+        seed: seed of the first resample
+        award: the award whose vote shares are predicted
+    Returns:
+        ensemble: dictionary with the fitted 'members', the fitted 'scaler', the 'features', the 'award'
+                  and the 'residual_std' of the members on their out-of-bag rows
+    """
+    from joblib import Parallel, delayed
+    from sklearn.preprocessing import StandardScaler
+
+    spec = model_registry[model_key]
+    estimator = spec.estimator()
+    if params is None:
+        params = {}
+        saved_model_path = model_file(spec.artifact, year, award)
+        if os.path.exists(saved_model_path):
+            bundle = load_model_bundle(saved_model_path)
+            params = bundle['params'] or bundle['model'].get_params()
+
+    X_tr, y_tr, _, _, _ = split_features(data, year, award)
+    features = list(X_tr.columns)
+    scaler = StandardScaler()
+    X_tr = scaler.fit_transform(X_tr)
+    y_tr = y_tr.to_numpy()
+
+    results = Parallel(n_jobs=n_jobs)(delayed(fit_member)(estimator, params, X_tr, y_tr, seed + member)
+                                      for member in range(n_members))
+    members = [model for model, _ in results]
+    residuals = np.concatenate([residuals for _, residuals in results])
+
+    return {'members': members,
+            'scaler': scaler,
+            'features': features,
+            'award': award,
+            'residual_std': float(np.std(residuals))}
+
+def predict_share_matrix(ensemble: dict, data: pd.DataFrame, year: int):
+    """
+    Scores a season with every member of an ensemble. Each member predicts the whole season in one
+    batched call instead of player by player.
+
+    Args:
+        ensemble: the bootstrap ensemble, see fit_bootstrap_ensemble
+        data: the cleaned player data
+        year: the season to score
+    Returns:
+        share_matrix: predicted MVP shares, one row per member and one column per player
+    """
+    _, _, X_te, _, _ = split_features(data, year, ensemble['award'])
+    X_te = ensemble['scaler'].transform(X_te[ensemble['features']])
+    return np.vstack([member.predict(X_te) for member in ensemble['members']])
+
+def simulate_races(share_matrix: np.array, n_sims: int = 10000, residual_std: float = 0.0, top_k: int = 3,
+                   seed: int = 0):
+    """
+    Simulates MVP races from a share matrix. Each race draws the predicted shares of a random member,
+    plus gaussian noise with the out-of-bag residual spread of the ensemble, and the winner and top_k of
+    every race are counted at once with argmax/argpartition over the whole (n_sims, n_players) array.
+
+    Args:
+        share_matrix: predicted MVP shares, one row per member and one column per player
+        n_sims: number of simulated races
+        residual_std: standard deviation of the noise added to every predicted share
+        top_k: finishing position counted for the top_k probability
+        seed: seed of the simulation
+    Returns:
+        win_probability: probability that each player wins the MVP
+        top_k_probability: probability that each player finishes in the top_k
+    """
+    rng = np.random.default_rng(seed)
+    n_members, n_players = share_matrix.shape
+    races = share_matrix[rng.integers(0, n_members, n_sims)]
+    if residual_std > 0:
+        races = races + rng.normal(0.0, residual_std, races.shape)
+
+    winners = races.argmax(axis=1)
+    win_probability = np.bincount(winners, minlength=n_players) / n_sims
+
+    top_k = min(top_k, n_players)
+    top_finishers = np.argpartition(-races, top_k - 1, axis=1)[:, :top_k]
+    top_k_probability = np.bincount(top_finishers.ravel(), minlength=n_players) / n_sims
+    return win_probability, top_k_probability
+
+def race_results(player_names: list, model_name: str, share_matrix: np.array, residual_std: float,
+                 n_sims: int, seed: int, award: str = 'mvp'):
+    """
+    Simulates the MVP races of a share matrix and times the simulation
+
+    Args:
+        player_names: list of player names matching up with the columns of share_matrix
+        model_name: name of the model the share matrix was predicted with
+        share_matrix: predicted MVP shares, one row per member and one column per player
+        residual_std: standard deviation of the noise added to every predicted share
+        n_sims: number of simulated races
+        seed: seed of the simulation
+        award: the award of the race, names the predicted share column, e.g. 'predicted_roy_share'
+    Returns:
+        results_df: predicted award share, win probability and top 3 probability of each player
+    """
+    begin = time.perf_counter()
+    win_probability, top_3_probability = simulate_races(share_matrix, n_sims, residual_std, seed=seed)
+    print(f'Simulated {n_sims} races for {model_name} in {(time.perf_counter() - begin) * 1000:.1f} ms')
+    return pd.DataFrame({'player': player_names,
+                         'model': model_name,
+                         f'predicted_{award}_share': share_matrix.mean(axis=0),
+                         'win_probability': win_probability,
+                         'top_3_probability': top_3_probability})
+
+def mvp_probabilities(data: pd.DataFrame, year: int, model_keys: list = None, n_members: int = 50,
+                      n_sims: int = 10000, n_jobs: int = -1, seed: int = 0, award: str = 'mvp'):
+    """
+    Probability of each player winning the MVP and finishing in the top 3 of a season, from a bootstrap
+    ensemble of each registered model. The members of every model are also pooled into an 'Ensemble' race.
+
+    Args:
+        data: the cleaned player data
+        year: the season to score, left out of training
+        model_keys: artifact names of the models in the registry, defaults to every registered model
+        n_members: number of bootstrap members per model
+        n_sims: number of simulated races
+        n_jobs: number of parallel workers, -1 uses every core
+        seed: seed of the resamples and simulations
+        award: the award whose race is simulated, the MVP by default
+    Returns:
+        probabilities_df: predicted award share, win probability and top 3 probability of each player and model,
+                          sorted by win probability
+    """
+    if model_keys is None:
+        model_keys = list(model_registry)
+
+    player_names = list(data[data['year'] == year]['player'])
+    share_matrices, residual_stds, dfs = [], [], []
+
+    for model_key in model_keys:
+        ensemble = fit_bootstrap_ensemble(model_key, data, year, n_members, n_jobs=n_jobs, seed=seed, award=award)
+        share_matrix = predict_share_matrix(ensemble, data, year)
+        share_matrices.append(share_matrix)
+        residual_stds.append(ensemble['residual_std'])
+        dfs.append(race_results(player_names, model_registry[model_key].name, share_matrix,
+                                ensemble['residual_std'], n_sims, seed, award))
+
+    if len(model_keys) > 1:
+        dfs.append(race_results(player_names, 'Ensemble', np.vstack(share_matrices),
+                                float(np.mean(residual_stds)), n_sims, seed, award))
+
+    probabilities_df = pd.concat(dfs)
+    return probabilities_df.sort_values(['model', 'win_probability'], ascending=[True, False]).reset_index(drop=True)
@@ -0,0 +1,120 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from model import model_file, oof_file, load_model_bundle, save_model_bundle, get_metrics, display_mvp_race_results
+from registry import model_registry
+
+
+class StackedEnsemble:
+    """
+    Combines the predictions of saved base models with a meta model fitted on their out-of-fold predictions.
+    Behaves like a single estimator, so it is saved in a model bundle and scored like any other model.
+    """
+    def __init__(self, model_keys: list, base_models: list, meta_model):
+        self.model_keys = model_keys
+        self.base_models = base_models
+        self.meta_model = meta_model
+
+    def predict(self, X: np.array):
+        base_pred = np.column_stack([model.predict(X) for model in self.base_models])
+        return self.meta_model.predict(base_pred)
+
+
+def available_base_models(year: int, award: str = 'mvp'):
+    """
+    Registered models whose out-of-fold predictions are cached for a season, see model.train_model
+    """
+    return [model_key for model_key, spec in model_registry.items()
+            if os.path.exists(oof_file(spec.artifact, year, award))]
+
+def load_oof_predictions(model_keys: list, year: int, award: str = 'mvp'):
+    """
+    Loads the cached predictions of the base models, one column per model
+
+    Args:
+        model_keys: artifact names of the base models in the registry
+        year: the season the base models left out for testing
+        award: the award whose vote shares are predicted
+    Returns:
+        oof_df: one row per player and season with the 'player', 'year', 'actual' share, 'fold'
+                ('oof' for the training seasons, 'test' for the test season) and a prediction column per model
+    """
+    oof_df = None
+    for model_key in model_keys:
+        save_file = oof_file(model_registry[model_key].artifact, year, award)
+        if not os.path.exists(save_file):
+            raise FileNotFoundError(f'No out-of-fold predictions in {save_file}, train {model_key} for {year} first')
+
+        predictions = pd.read_csv(save_file).rename(columns={'prediction': model_key})
+        predictions = predictions.sort_values('row').reset_index(drop=True)
+        if oof_df is None:
+            oof_df, first_key = predictions, model_key
+            continue
+
+        # Rows are positions in the player data, which merge and backfill can rebuild in another order,
+        # so the rows of every model must still refer to the same players, seasons and shares
+        id_columns = [column for column in oof_df.columns if column not in model_keys]
+        if list(predictions.columns.drop(model_key)) != id_columns or \
+                not predictions[id_columns].equals(oof_df[id_columns]):
+            raise ValueError(f'The cached predictions of {model_key} and {first_key} for {year} refer to different '
+                             f'player data, retrain them on the current player data')
+        oof_df[model_key] = predictions[model_key]
+    return oof_df
+
+def fit_stacked_ensemble(year: int, model_keys: list = None, metrics_df: pd.DataFrame = None, save: bool = True,
+                         award: str = 'mvp'):
+    """
+    Fits a stacked ensemble of the saved base models on their cached out-of-fold predictions only, without
+    retraining any base model. The meta model is a non-negative linear regression, so each base model gets
+    a weight that can be read as its contribution to the blend.
+
+    Args:
+        year: the season the base models left out for testing
+        model_keys: artifact names of the base models in the registry, defaults to every model with cached
+                    out-of-fold predictions for the season
+        metrics_df: the overall metrics dataframe, the metrics of the stacked ensemble are added to it
+        save: whether to save the ensemble as 'models/stacked_{year}.dat', see model.model_file
+        award: the award whose vote shares are predicted
+    Returns:
+        metrics_df: the overall metrics dataframe including the stacked ensemble
+        weights: the weight of each base model in the blend
+    """
+    from sklearn.linear_model import LinearRegression
+
+    if model_keys is None:
+        model_keys = available_base_models(year, award)
+    if len(model_keys) < 2:
+        raise ValueError(f'Stacking needs at least two base models trained for {year}, found {model_keys}')
+    if metrics_df is None:
+        metrics_df = pd.DataFrame()
+
+    oof_df = load_oof_predictions(model_keys, year, award)
+    train = oof_df[oof_df['fold'] == 'oof']
+    test = oof_df[oof_df['fold'] == 'test']
+
+    begin = time.perf_counter()
+    meta_model = LinearRegression(positive=True)
+    meta_model.fit(train[model_keys].to_numpy(), train['actual'].to_numpy())
+    fit_seconds = time.perf_counter() - begin
+
+    y_pred = meta_model.predict(test[model_keys].to_numpy())
+    metrics_df = get_metrics(test['actual'], y_pred, metrics_df, 'Stacked', year, {'Fit Time (s)': fit_seconds})
+    display_mvp_race_results(test['actual'], y_pred, 'Stacked', list(test['player']), award)
+
+    weights = {model_key: float(weight) for model_key, weight in zip(model_keys, meta_model.coef_)}
+    print(f'Stacked weights: {weights}, intercept: {meta_model.intercept_:.4f}')
+
+    if save:
+        # The base models of a season share the scaler and features fitted on the same training seasons
+        base_bundles = [load_model_bundle(model_file(model_registry[model_key].artifact, year, award))
+                        for model_key in model_keys]
+        bundle = {'model': StackedEnsemble(model_keys, [base['model'] for base in base_bundles], meta_model),
+                  'scaler': base_bundles[0]['scaler'],
+                  'features': base_bundles[0]['features'],
+                  'params': {'model_keys': model_keys},
+                  'metadata': {'name': 'Stacked', 'year': year, 'award': award, 'weights': weights}}
+        save_model_bundle(bundle, model_file('stacked', year, award))
+
+    return metrics_df, weights